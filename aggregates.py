@@ -0,0 +1,378 @@
+"""
+Running event statistics, updated on every stored submission so a live stats
+page (and the percentile line on the results page) never has to scan the responses.
+The state file is shared by every worker process: updates take a file lock and
+merge into the latest saved state.
+
+    python aggregates.py rebuild assessment_results.db          # recompute and save
+    python aggregates.py rebuild assessment_results.db --check  # compare with the saved totals
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from data import current_bank, require_bank
+from locks import file_lock
+from scoring import calculate_bmi, calculate_results, get_health_label
+
+AGGREGATES_PATH = "live_aggregates.json"
+CATEGORIES = ('Physical', 'Mental')
+BMI_MAX = calculate_bmi(60, 170)[3]
+# Percentiles are not shown until this many responses are in
+MIN_PERCENTILE_RESPONSES = 20
+
+
+def score_range(bank=None):
+    """
+    Largest possible total per category (Physical includes BMI).
+    """
+    category_max = (bank or current_bank()).category_max
+    return {'Physical': category_max['Physical'] + BMI_MAX, 'Mental': category_max['Mental']}
+
+
+def empty_state(bank=None):
+    """
+    Zero totals sized for a bank (default: the current one); rows of other banks extend them.
+    """
+    bank = bank or current_bank()
+    top = score_range(bank)
+    return {
+        'version': 1,
+        'count': 0,
+        'categories': {cat: {'score_sum': 0, 'max_sum': 0, 'score_hist': [0] * (top[cat] + 1)}
+                       for cat in CATEGORIES},
+        'levels': {cat: {} for cat in CATEGORIES},
+        'choices': {str(q.id): [0] * len(q.choice_scores) for q in bank.questions},
+        'bmi_bands': {},
+    }
+
+
+def row_answers(row, bank=None):
+    """
+    0-based answers from a stored row's 1-based Q<id> columns (blank/missing = unanswered).
+    """
+    answers = {}
+    for q in (bank or current_bank()).questions:
+        value = row.get(f"Q{q.id}")
+        if value is None or value == "" or value != value:  # NaN
+            continue
+        answers[q.id] = int(float(value)) - 1
+    return answers
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value
+
+
+def bmi_band(weight, height):
+    """
+    batch_scoring's BMI category code (-1 not given, 0 incomplete, 1 Underweight ... 5 Obese II)
+    for one row, using calculate_bmi's bands. Scalar, so a submission does not load numpy.
+    """
+    if not weight or not height or weight != weight or height != height:
+        return -1
+    if height <= 0:
+        return 0
+    bmi = weight / ((height / 100) ** 2)
+    if bmi < 18.5:
+        return 1
+    elif 18.5 <= bmi <= 22.9:
+        return 2
+    elif 23.0 <= bmi <= 24.9:
+        return 3
+    elif 25.0 <= bmi <= 29.9:
+        return 4
+    return 5
+
+
+def _add_counts(a, b):
+    """
+    Element-wise sum of two count lists, the shorter one padded with zeros.
+    """
+    n = max(len(a), len(b))
+    return [int(x) + int(y) for x, y in zip(list(a) + [0] * (n - len(a)), list(b) + [0] * (n - len(b)))]
+
+
+class ScoreDistribution:
+    """
+    Cumulative counts over one category's totals (a small integer domain),
+    so a percentile is two tuple lookups.
+    """
+    __slots__ = ('total', 'below', 'at')
+
+    def __init__(self, hist):
+        below = []
+        running = 0
+        for n in hist:
+            below.append(running)
+            running += n
+        self.total = running
+        self.below = tuple(below)
+        self.at = tuple(hist)
+
+    def percentile(self, score):
+        """
+        Share of responses (0-100) with a lower total, or None when there are none.
+        """
+        if not self.total:
+            return None
+        score = min(max(int(score), 0), len(self.below) - 1)
+        return self.below[score] / self.total * 100
+
+
+class LiveAggregates:
+    def __init__(self, path=AGGREGATES_PATH, state=None, refresh_interval=5.0):
+        self.path = path
+        self.state = state or empty_state()
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._distributions = {}
+        self._mtime = self._stat()
+        self._checked = time.monotonic()
+
+    @classmethod
+    def load(cls, path=AGGREGATES_PATH):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls(path, json.load(f))
+        except FileNotFoundError:
+            return cls(path)
+
+    def _stat(self):
+        # os.replace gives the file a new inode, so a save within the same mtime tick still differs
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def refresh(self, force=False):
+        """
+        Pick up totals saved by other processes (checked at most every refresh_interval seconds).
+        force: reload whenever the file exists (add_row does, under the file lock).
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.refresh_interval:
+            return
+        self._checked = now
+        mtime = self._stat()
+        if mtime is None or (mtime == self._mtime and not force):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        with self._lock:
+            self.state = state
+            self._distributions = {}
+            self._mtime = mtime
+
+    def save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock:
+            data = json.dumps(self.state, ensure_ascii=False, separators=(",", ":"))
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+        self._mtime = self._stat()
+
+    def add_row(self, row, save=True):
+        """
+        Fold one stored submission row (as written by build_submission_row) into the totals.
+        With save, the update is merged into the file under a lock shared with other processes.
+        """
+        if save:
+            with file_lock(self.path):
+                self.refresh(force=True)
+                self.add_row(row, save=False)
+                self.save()
+            return
+
+        # Rows without a Bank_Version use the current bank; an unknown version raises (like score_batch)
+        version = _number(row.get('Bank_Version'))
+        bank = require_bank(None if version is None else int(version))
+        answers = row_answers(row, bank)
+        weight, height = _number(row.get('Weight')), _number(row.get('Height'))
+        results, _, _ = calculate_results(answers, weight=weight, height=height, bank=bank)
+
+        with self._lock:
+            self._distributions = {}
+            s = self.state
+            s['count'] += 1
+            for cat in CATEGORIES:
+                score, max_score = results[cat]['score'], results[cat]['max']
+                c = s['categories'][cat]
+                c['score_sum'] += score
+                c['max_sum'] += max_score
+                hist = c['score_hist']
+                if score >= len(hist):  # a newer bank with a higher maximum
+                    hist.extend([0] * (score + 1 - len(hist)))
+                hist[score] += 1
+                label = get_health_label(score, max_score)
+                s['levels'][cat][label] = s['levels'][cat].get(label, 0) + 1
+            for qid, choice in answers.items():
+                counts = s['choices'].setdefault(str(qid), [])
+                if choice >= len(counts):
+                    counts.extend([0] * (len(bank.by_id[qid].choice_scores) - len(counts)))
+                counts[choice] += 1
+            band = str(bmi_band(weight, height))
+            s['bmi_bands'][band] = s['bmi_bands'].get(band, 0) + 1
+
+    def add_frame(self, df, bank=None):
+        """
+        Vectorized equivalent of add_row for a chunk of stored rows.
+        Without an explicit bank, each row is counted against its Bank_Version.
+        """
+        import numpy as np
+        from batch_scoring import answer_matrix, bank_arrays, score_batch, split_by_bank_version
+
+        if df.empty:
+            return
+        if bank is None:
+            groups = split_by_bank_version(df)
+            if groups is not None:
+                for group_bank, rows in groups:
+                    self.add_frame(rows, bank=group_bank)
+                return
+        scored = score_batch(df, bank=bank)
+        arrays = bank_arrays(bank)
+        idx = answer_matrix(df, bank)
+        with self._lock:
+            self._distributions = {}
+            s = self.state
+            s['count'] += len(df)
+            for cat in CATEGORIES:
+                c = s['categories'][cat]
+                scores = scored[f'{cat}_Score'].to_numpy()
+                c['score_sum'] += int(scores.sum())
+                c['max_sum'] += int(scored[f'{cat}_Max'].sum())
+                c['score_hist'] = _add_counts(c['score_hist'], np.bincount(scores))
+                for label, n in scored[f'{cat}_Level'].value_counts().items():
+                    s['levels'][cat][label] = s['levels'][cat].get(label, 0) + int(n)
+            for j, qid in enumerate(arrays.question_ids):
+                picked = idx[:, j][idx[:, j] >= 0]
+                counts = np.bincount(picked, minlength=int(arrays.n_choices[j]))
+                s['choices'][str(qid)] = _add_counts(s['choices'].get(str(qid), []), counts)
+            for band, n in scored['BMI_Category'].value_counts().items():
+                s['bmi_bands'][str(band)] = s['bmi_bands'].get(str(band), 0) + int(n)
+
+    def distribution(self, category):
+        with self._lock:
+            dist = self._distributions.get(category)
+            if dist is None:
+                dist = self._distributions[category] = ScoreDistribution(
+                    self.state['categories'][category]['score_hist'])
+            return dist
+
+    def percentile(self, category, score):
+        self.refresh()
+        return self.distribution(category).percentile(score)
+
+    def stats(self):
+        """
+        Live numbers for a stats page; cost does not depend on the number of responses.
+        """
+        with self._lock:
+            s = self.state
+            out = {'count': s['count'], 'bmi_bands': dict(s['bmi_bands'])}
+            for cat in CATEGORIES:
+                c = s['categories'][cat]
+                out[cat] = {
+                    'avg_pct': round(c['score_sum'] / c['max_sum'] * 100, 1) if c['max_sum'] else None,
+                    'levels': dict(s['levels'][cat]),
+                }
+            out['choices'] = {qid: list(v) for qid, v in s['choices'].items()}
+            return out
+
+
+_live = {}
+_live_lock = threading.Lock()
+
+
+def get_live_aggregates(path=AGGREGATES_PATH):
+    """
+    Shared totals for one state file, loaded once per process.
+    """
+    with _live_lock:
+        agg = _live.get(path)
+        if agg is None:
+            agg = _live[path] = LiveAggregates.load(path)
+        return agg
+
+
+_percentile_path = None
+
+
+def score_percentiles(results, min_responses=MIN_PERCENTILE_RESPONSES):
+    """
+    {'Physical': pct, 'Mental': pct}: share of earlier responses with a lower total
+    (None until min_responses are in, or when totals are off).
+    """
+    global _percentile_path
+    if _percentile_path is None:
+        from config import get_storage_config
+        _percentile_path = get_storage_config()['aggregates_path']
+    if not _percentile_path:
+        return dict.fromkeys(CATEGORIES)
+    live = get_live_aggregates(_percentile_path)
+    return {cat: live.percentile(cat, results[cat]['score'])
+            if live.distribution(cat).total >= min_responses else None
+            for cat in CATEGORIES}
+
+
+def rebuild(source, chunksize=10000):
+    from report import iter_chunks
+
+    agg = LiveAggregates()
+    for chunk in iter_chunks(source, chunksize):
+        agg.add_frame(chunk)
+    return agg
+
+
+def diff_states(expected, actual):
+    """
+    Human-readable differences between two states (empty list = identical).
+    """
+    problems = []
+
+    def walk(a, b, path):
+        if isinstance(a, dict) and isinstance(b, dict):
+            for key in sorted(set(a) | set(b)):
+                walk(a.get(key, 0), b.get(key, 0), f"{path}.{key}")
+        elif a != b:
+            problems.append(f"{path.lstrip('.')}: rebuilt={a} running={b}")
+
+    walk(expected, actual, "")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("rebuild", help="recompute the totals from the raw response history")
+    p.add_argument("source", help="CSV export, SQLite database or spool file")
+    p.add_argument("--state", default=AGGREGATES_PATH)
+    p.add_argument("--check", action="store_true", help="only compare with the saved totals")
+    p.add_argument("--chunksize", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    rebuilt = rebuild(args.source, args.chunksize)
+    if args.check:
+        problems = diff_states(rebuilt.state, LiveAggregates.load(args.state).state)
+        for line in problems:
+            print(line)
+        print("OK" if not problems else f"{len(problems)} mismatches")
+        return 1 if problems else 0
+    rebuilt.path = args.state
+    rebuilt.save()
+    print(f"Rebuilt {rebuilt.state['count']} responses into {args.state}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
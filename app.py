@@ -1,93 +1,72 @@
+import os
+import uuid
 import streamlit as st
-import pandas as pd
-from data import questions
-from utils import calculate_results, create_bar_chart, generate_summary, save_to_google_sheet
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import metrics
+import data
+from render import CSS, question_views
+# Attribute access only: plotly and the Sheets stack load when the results/final steps first need them
+import utils
 
 # --- 1. CONFIG & CONSTANTS ---
 st.set_page_config(page_title="Psychological Health Assessment", page_icon="🌿", layout="wide")
-SHEET_URL = "https://docs.google.com/spreadsheets/d/1ET8CJvJ2gq-lUfLP9NQNyNvy67JLd2NsjRwLuWAYLo4/edit?usp=sharing"
+# Where submissions are stored is configured in config.py ([storage] secrets / STORAGE_* env)
+
+# Optional: precompute every reachable results chart once per process (WARM_CHART_CACHE=1)
+@st.cache_resource
+def _warm_chart_cache():
+    return utils.warm_bar_chart_cache()
+
+if os.environ.get("WARM_CHART_CACHE") == "1":
+    _warm_chart_cache()
+
+@st.cache_resource
+def _configure_metrics():
+    return metrics.configure_from_env()
+
+_configure_metrics()
+
+# Picks up edits to question_bank.json without a restart (file checked every few seconds)
+data.reload_bank()
+
+# Optional multi-process mode: progress is kept in the shared store (config.py shared_state),
+# keyed by a token in the URL, so any worker can continue a session
+@st.cache_resource
+def _session_store():
+    from config import get_storage_config
+    path = get_storage_config()['shared_state']
+    if not path:
+        return None
+    from shared_state import get_session_store
+    return get_session_store(path)
+
+session_store = _session_store()
+if session_store is not None and 'session_token' not in st.session_state:
+    token = st.query_params.get("s")
+    restored = session_store.load(token) if token else None
+    if restored:
+        st.session_state.update(restored)
+    else:
+        token = uuid.uuid4().hex
+        st.query_params["s"] = token
+    st.session_state.session_token = token
+    st.session_state.session_saved = session_store.encode(st.session_state) if restored else None
+
+def save_progress():
+    if session_store is None:
+        return
+    encoded = session_store.encode(st.session_state)
+    if encoded != st.session_state.session_saved:
+        session_store.save(st.session_state.session_token, encoded)
+        st.session_state.session_saved = encoded
+
+def _browser_session_id():
+    # Unlike session_state, survives "ทำแบบประเมินใหม่" (lead rate limit is per browser session)
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
 
 # --- 2. CSS STYLES ---
-st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Prompt:wght@300;400;500;600&display=swap');
-    
-    .stApp { background: linear-gradient(135deg, #e0f2f1 0%, #fff9c4 100%); font-family: 'Prompt', sans-serif; }
-    h1, h2, h3, h4, h5, h6 { color: #000000 !important; font-weight: 600; font-family: 'Prompt', sans-serif; }
-    p, span, div, li, label, .stMarkdown { color: #000000 !important; font-family: 'Prompt', sans-serif; }
-    
-    .block-container {
-        padding-top: 1.5rem !important;
-        padding-bottom: 5rem !important;
-        max-width: 100% !important;
-    }
-    
-    @media (max-width: 600px) {
-        h1 { font-size: 1.5rem !important; line-height: 1.3 !important; }
-        h2 { font-size: 1.3rem !important; }
-        h3 { font-size: 1.1rem !important; }
-        p, .stMarkdown p { font-size: 0.95rem !important; }
-        .content-card { padding: 1.5rem !important; }
-    }
-    
-    @media (min-width: 900px) {
-        .block-container {
-            max-width: 900px !important;
-            padding-top: 4rem !important;
-            margin: 0 auto;
-        }
-        h1 { font-size: 2.2rem !important; }
-    }
-    
-    .content-card { 
-        background: white; 
-        padding: 2.5rem; 
-        border-radius: 24px; 
-        box-shadow: 0 8px 30px rgba(0,0,0,0.08); 
-        margin-bottom: 2rem; 
-        text-align: center;
-    }
-
-    .summary-box {
-        background-color: #FFF3E0; 
-        border: 2px solid #FF9800;
-        border-radius: 15px; 
-        padding: 25px; 
-        margin-top: 10px;
-        color: #000000 !important;
-        font-size: 1.1rem;
-        line-height: 1.7;
-        text-align: left;
-    }
-
-    .stButton > button {
-        width: 100%;
-        border-radius: 16px !important;
-        padding: 1rem 1rem !important;
-        font-family: 'Prompt', sans-serif !important;
-        font-size: 1.3rem !important;
-        font-weight: 500 !important;
-        transition: all 0.2s ease;
-    }
-
-    .stButton > button[kind="primary"] {
-        background: linear-gradient(135deg, #2ECC71 0%, #27AE60 100%) !important;
-        color: white !important; 
-        border: None !important;
-        box-shadow: 0 10px 20px rgba(46, 204, 113, 0.3);
-    }
-    
-    .stButton > button:not([kind="primary"]) {
-        background-color: white !important;
-        color: #2E7D32 !important;
-        border: 2px solid #E0E0E0 !important; 
-    }
-    
-    div[data-testid="stRadio"] label p { color: #000000 !important; font-size: 1.15rem; }
-    div[data-testid="stRadio"] { background-color: rgba(255,255,255,0.5); padding: 10px; border-radius: 10px; }
-    
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(CSS, unsafe_allow_html=True)
 
 # --- 3. SESSION STATE ---
 if 'step' not in st.session_state: st.session_state.step = 'landing'
@@ -99,8 +78,27 @@ if 'age' not in st.session_state: st.session_state.age = 25
 if 'consent' not in st.session_state: st.session_state.consent = False
 if 'interest' not in st.session_state: st.session_state.interest = "สนใจ"
 if 'email' not in st.session_state: st.session_state.email = ""
+if 'save_key' not in st.session_state: st.session_state.save_key = None
+if 'save_result' not in st.session_state: st.session_state.save_result = None
+# A session keeps the question bank it started with, even if the file is edited meanwhile
+if 'bank_version' not in st.session_state: st.session_state.bank_version = data.current_bank().version
+bank = data.get_bank(st.session_state.bank_version)
+if bank is None:
+    # Resumed with a bank this worker cannot load (no archived copy): the answers are
+    # choice indices into that bank, so start the assessment over instead of rescoring them
+    bank = data.current_bank()
+    st.session_state.bank_version = bank.version
+    if st.session_state.answers and st.session_state.save_result is None:
+        st.session_state.update(step='info', q_idx=0, answers={}, save_key=None)
+        st.session_state.bank_restarted = True
+questions = bank.questions
 
 # --- 4. NAVIGATION LOGIC ---
+def rerun():
+    # Ends the run early; its time is recorded as step.<name>.rerun (see metrics.start_timer)
+    stop_step_timer(".rerun")
+    st.rerun()
+
 def next_step():
     if st.session_state.step == 'landing': st.session_state.step = 'info'
     elif st.session_state.step == 'info': st.session_state.step = 'assessment'
@@ -113,7 +111,8 @@ def next_step():
         st.session_state.step = 'leads'
     elif st.session_state.step == 'leads':
         st.session_state.step = 'final'
-    st.rerun()
+    save_progress()
+    rerun()
 
 def prev_step():
     if st.session_state.step == 'leads':
@@ -128,10 +127,14 @@ def prev_step():
             st.session_state.step = 'info'
     elif st.session_state.step == 'info':
         st.session_state.step = 'landing'
-    st.rerun()
+    save_progress()
+    rerun()
 
 # --- 5. PAGE CONTENT ---
 
+# Per-step timing (no-op unless metrics are enabled, see metrics.py)
+stop_step_timer = metrics.start_timer(f"step.{st.session_state.step}")
+
 if st.session_state.step == 'landing':
     st.markdown("<br><br>", unsafe_allow_html=True)
     st.markdown("""
@@ -148,6 +151,8 @@ if st.session_state.step == 'landing':
         next_step()
 
 elif st.session_state.step == 'info':
+    if st.session_state.pop('bank_restarted', False):
+        st.warning("แบบประเมินได้รับการปรับปรุงระหว่างที่คุณทำอยู่ กรุณาเริ่มตอบใหม่อีกครั้งครับ")
     st.markdown("<div class='content-card'>", unsafe_allow_html=True)
     st.header("📋 ข้อมูลพื้นฐาน")
     st.write("กรุณาระบุข้อมูลเพื่อใช้คำนวณดัชนีมวลกาย (BMI)")
@@ -171,24 +176,17 @@ elif st.session_state.step == 'info':
 elif st.session_state.step == 'assessment':
     q_idx = st.session_state.q_idx
     current_q = questions[q_idx]
+    view = question_views(bank)[q_idx]
 
-    icon = "💪" if current_q.category == 'Physical' else "🧠"
-    progress = (q_idx + 1) / len(questions)
+    st.markdown(view.header_html, unsafe_allow_html=True)
+    st.progress(view.progress)
+    st.markdown(view.counter_html, unsafe_allow_html=True)
 
-    st.markdown(f"<p style='text-align:center; font-size: 1.2rem; margin-bottom: 0;'>{icon} {current_q.category} Assessment</p>", unsafe_allow_html=True)
-    st.progress(progress)
-    st.markdown(f"<p style='text-align:center; color:#666;'>ข้อที่ {q_idx + 1} จาก {len(questions)}</p>", unsafe_allow_html=True)
+    st.markdown(view.card_html, unsafe_allow_html=True)
 
-    st.markdown(f"<div class='content-card'><h3>{current_q.text}</h3></div>", unsafe_allow_html=True)
-
-    options = [c['text'] for c in current_q.choices]
     default_idx = st.session_state.answers.get(current_q.id, 0)
-    choice_str = st.radio("เลือกคำตอบ:", options, index=default_idx, key=f"radio_{current_q.id}", label_visibility="collapsed")
-    
-    for i, c in enumerate(current_q.choices):
-        if c['text'] == choice_str:
-            st.session_state.answers[current_q.id] = i
-            break
+    choice_str = st.radio("เลือกคำตอบ:", view.options, index=default_idx, key=f"radio_{current_q.id}", label_visibility="collapsed")
+    st.session_state.answers[current_q.id] = view.index_by_text[choice_str]
 
     st.markdown("<br>", unsafe_allow_html=True)
     c1, c2 = st.columns(2)
@@ -202,31 +200,28 @@ elif st.session_state.step == 'results':
     st.balloons()
     st.markdown("<h1 style='text-align: center;'>📊 สรุปผลการประเมิน</h1>", unsafe_allow_html=True)
     
-    results, strengths, gaps = calculate_results(
-        st.session_state.answers, 
-        weight=st.session_state.weight, 
-        height=st.session_state.height
-    )
+    memo = utils.get_memoized_results(st.session_state)
+    results = memo['results']
     
     st.markdown("<div class='content-card' style='padding: 1.5rem;'>", unsafe_allow_html=True)
     st.subheader("ภาพรวมสุขภาพ (Score Overview)")
-    fig = create_bar_chart(results)
+    fig = utils.create_bar_chart(results)
     st.plotly_chart(fig, width='stretch', config={'staticPlot': True})
+    percentiles = utils.score_percentiles(results)
+    for cat, label in (('Physical', 'สุขภาพกาย'), ('Mental', 'สุขภาพใจ')):
+        if percentiles[cat] is not None:
+            st.caption(f"คะแนน{label}ของคุณสูงกว่า {percentiles[cat]:.0f}% ของผู้ร่วมประเมิน")
     st.markdown("</div>", unsafe_allow_html=True)
     
     st.subheader("🛠️ ข้อแนะนำเพื่อการปรับปรุง")
-    summary_html = generate_summary(gaps)
+    summary_html = memo['summary_html']
     st.markdown(f"<div class='summary-box'>{summary_html}</div>", unsafe_allow_html=True)
     
     st.markdown("<br>", unsafe_allow_html=True)
     
     st.subheader("🌟 จุดแข็งของคุณ")
-    for item in strengths:
-        st.markdown(f"""
-            <div style='background: #E8F5E9; padding: 15px; border-radius: 12px; margin-bottom: 10px; border-left: 5px solid #2E7D32;'>
-                <b>✅ {item['topic']}</b>: {item['advice']}
-            </div>
-        """, unsafe_allow_html=True)
+    if memo['strengths_html']:
+        st.markdown(memo['strengths_html'], unsafe_allow_html=True)
 
     st.divider()
     c1, c2 = st.columns(2)
@@ -262,34 +257,65 @@ elif st.session_state.step == 'leads':
         if st.button("บันทึกและเสร็จสิ้น ✅", type="primary"): next_step()
 
 elif st.session_state.step == 'final':
-    st.balloons()
+    # Saved once per assessment in the background; reruns only poll the same save
+    if st.session_state.save_key is None:
+        st.session_state.save_key = uuid.uuid4().hex
+        st.balloons()
+        if st.session_state.consent and st.session_state.interest == "สนใจ" and st.session_state.email.strip():
+            try:
+                st.session_state.lead_status = utils.capture_lead(st.session_state.email, _browser_session_id())
+            except Exception:
+                st.session_state.lead_status = "error"
     st.markdown("<div class='content-card'>", unsafe_allow_html=True)
     st.header("🎉 ขอบคุณที่ร่วมประเมิน")
     
-    results, strengths, gaps = calculate_results(
-        st.session_state.answers, 
-        weight=st.session_state.weight, 
-        height=st.session_state.height
-    )
-    
-    with st.spinner("กำลังบันทึกข้อมูล..."):
-        success, msg = save_to_google_sheet(
+    # A completed save is recorded in the session, so a session resumed on another
+    # worker shows the outcome instead of submitting the row again
+    if st.session_state.save_result is None:
+        results = utils.get_memoized_results(st.session_state)['results']
+        save = utils.submit_submission(
+            st.session_state.save_key,
             st.session_state.weight, 
             st.session_state.height,
             st.session_state.age, 
             results, 
             st.session_state.answers,
-            SHEET_URL,
             consent=st.session_state.consent,
             interest=st.session_state.interest,
-            email=st.session_state.email
+            bank_version=st.session_state.bank_version
         )
+        if save.done():
+            st.session_state.save_result = save.result()
+        else:
+            @st.fragment(run_every=0.5)
+            def save_status():
+                if save.done():
+                    # Finished: one full rerun, which records and renders the result
+                    st.rerun()
+                st.info("⏳ กำลังบันทึกข้อมูล...")
+
+            save_status()
+
+    if st.session_state.save_result is not None:
+        success, msg = st.session_state.save_result
         if success: st.success(msg)
         else: st.warning(msg)
+    lead_status = st.session_state.get('lead_status')
+    if lead_status == "saved": st.success("ลงทะเบียนรับข้อมูล Board Game เรียบร้อย")
+    elif lead_status == "duplicate": st.info("email นี้ลงทะเบียนรับข้อมูลไว้แล้ว")
+    elif lead_status == "invalid": st.warning("รูปแบบ email ไม่ถูกต้อง จึงยังไม่ได้ลงทะเบียนรับข้อมูล")
+    elif lead_status == "rate_limited": st.warning("ลงทะเบียนบ่อยเกินไป กรุณาลองใหม่ภายหลัง")
+    elif lead_status == "error": st.warning("ไม่สามารถบันทึกการลงทะเบียนรับข้อมูลได้ในขณะนี้")
 
     st.write("การประเมินเสร็จสมบูรณ์ คุณสามารถปิดหน้านี้ได้ทันที หรือกดปุ่มด้านล่างเพื่อเริ่มใหม่")
     st.markdown("</div>", unsafe_allow_html=True)
     
     if st.button("🔄 ทำแบบประเมินใหม่", type="primary"):
+        if session_store is not None:
+            session_store.delete(st.session_state.session_token)
+            st.query_params.clear()
         st.session_state.clear()
-        st.rerun()
+        rerun()
+
+stop_step_timer()
+save_progress()
@@ -0,0 +1,222 @@
+"""
+Compact archive of stored responses: one fixed-width record per response.
+
+    python archive.py export assessment_results.db responses.npy    # or .parquet (needs pyarrow)
+    python archive.py import responses.npy restored.db              # back into a sqlite/csv backend
+
+The .npy archive is a plain NumPy structured array, so analytics jobs can map it
+without copying:  np.load("responses.npy", mmap_mode="r")
+Archives are anonymous: e-mail addresses are not kept, only whether one was given.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import answer_matrix, bank_arrays, split_by_bank_version
+from data import current_bank, require_bank
+
+ARCHIVE_DTYPE = np.dtype([
+    ('id', 'V16'),          # Submission_ID (uuid4 hex as 16 raw bytes; zeros when missing)
+    ('timestamp', '<i8'),   # wall-clock seconds since 1970-01-01 (NO_TIMESTAMP, i.e. NaT, when missing)
+    ('answers', '<u8'),     # 2 bits per question of the record's bank, its first question in the lowest bits
+    ('answered', '<u4'),    # bit j set when the bank's j-th question was answered
+    ('weight', '<f4'),      # NaN = not given
+    ('height', '<f4'),
+    ('age', '<f4'),
+    ('flags', 'u1'),        # FLAG_* bits
+    ('bank', '<u2'),        # question bank version the answers are laid out for (0 = the current one)
+])
+NO_TIMESTAMP = np.iinfo(np.int64).min
+FLAG_INTERESTED = 1
+FLAG_EMAIL = 2
+INTERESTED, NOT_INTERESTED = "สนใจ", "ไม่สนใจ"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+
+def _layout(bank):
+    """
+    (question ids, bit shifts, answered bits) of a bank's answers in a record.
+    """
+    question_ids = bank_arrays(bank).question_ids
+    if any(len(q.choice_scores) > 4 for q in bank.questions):
+        raise ValueError(f"question bank v{bank.version}: answers no longer fit in 2 bits")
+    if len(question_ids) > 32:
+        raise ValueError(f"question bank v{bank.version}: answers no longer fit in one record")
+    shifts = np.arange(len(question_ids), dtype=np.uint64) * np.uint64(2)
+    bits = np.uint32(1) << np.arange(len(question_ids), dtype=np.uint32)
+    return question_ids, shifts, bits
+
+
+def _column(df, name, default=np.nan):
+    if name in df:
+        return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+    return np.full(len(df), default)
+
+
+def _id_bytes(value):
+    try:
+        raw = bytes.fromhex(str(value))
+    except ValueError:
+        return bytes(16)
+    return raw if len(raw) == 16 else bytes(16)
+
+
+def pack(df):
+    """
+    Stored rows (the columns written by build_submission_row) -> ARCHIVE_DTYPE records.
+    """
+    n = len(df)
+    out = np.zeros(n, dtype=ARCHIVE_DTYPE)
+    if 'Submission_ID' in df:
+        ids = b"".join(_id_bytes(v) for v in df['Submission_ID'])
+        out['id'] = np.frombuffer(ids, dtype='V16')
+
+    if 'Timestamp' in df:
+        ts = pd.to_datetime(df['Timestamp'], format=TIMESTAMP_FORMAT, errors='coerce')
+        out['timestamp'] = ts.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    else:
+        out['timestamp'] = NO_TIMESTAMP
+
+    # Each row's answers are laid out for its Bank_Version, which is recorded with them
+    frame = df.reset_index(drop=True)
+    for bank, rows in split_by_bank_version(frame) or [(current_bank(), frame)]:
+        at = rows.index.to_numpy()
+        _, shifts, bits = _layout(bank)
+        idx = answer_matrix(rows, bank)
+        answered = idx >= 0
+        out['answers'][at] = (np.where(answered, idx, 0).astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+        out['answered'][at] = np.where(answered, bits, 0).sum(axis=1, dtype=np.uint32)
+        out['bank'][at] = bank.version
+
+    out['weight'] = _column(df, 'Weight')
+    out['height'] = _column(df, 'Height')
+    out['age'] = _column(df, 'Age')
+
+    flags = np.zeros(n, dtype=np.uint8)
+    if 'Interest' in df:
+        flags |= np.where(df['Interest'].astype(str).to_numpy() == INTERESTED, FLAG_INTERESTED, 0).astype(np.uint8)
+    if 'Email' in df:
+        has_email = df['Email'].fillna("").astype(str).str.strip().to_numpy() != ""
+        flags |= np.where(has_email, FLAG_EMAIL, 0).astype(np.uint8)
+    out['flags'] = flags
+    return out
+
+
+def unpack(records):
+    """
+    ARCHIVE_DTYPE records -> DataFrame with the stored column names (Q<id> 1-based, NaN = unanswered).
+    Scores and levels are not archived; score_batch() recomputes them.
+    """
+    records = np.asarray(records)
+    ids = records['id'].tobytes()
+    df = pd.DataFrame({
+        'Submission_ID': [ids[i:i + 16].hex() if any(ids[i:i + 16]) else "" for i in range(0, len(ids), 16)],
+        'Timestamp': pd.to_datetime(records['timestamp'].astype('datetime64[s]'))
+                       .strftime(TIMESTAMP_FORMAT).fillna(""),
+        'Interest': np.where(records['flags'] & FLAG_INTERESTED, INTERESTED, NOT_INTERESTED),
+        'Email': "",
+        'Weight': records['weight'].astype(float),
+        'Height': records['height'].astype(float),
+        'Age': records['age'].astype(float),
+        'Bank_Version': np.where(records['bank'] > 0, records['bank'], np.nan),
+    })
+    current = current_bank().version
+    versions = np.where(records['bank'] > 0, records['bank'], current)
+    for version in dict.fromkeys(versions.tolist()):
+        rows = versions == version
+        question_ids, shifts, bits = _layout(require_bank(int(version)))
+        choice = (records['answers'][rows, None] >> shifts) & np.uint64(3)
+        answered = (records['answered'][rows, None] & bits) != 0
+        for j, qid in enumerate(question_ids):
+            column = df[f"Q{qid}"].to_numpy(copy=True) if f"Q{qid}" in df else np.full(len(df), np.nan)
+            column[rows] = np.where(answered[:, j], choice[:, j].astype(float) + 1, np.nan)
+            df[f"Q{qid}"] = column
+    return df
+
+
+def write_archive(records, path):
+    if path.endswith(".parquet"):
+        frame = pd.DataFrame({name: records[name] for name in ARCHIVE_DTYPE.names if name != 'id'})
+        frame.insert(0, 'id', [bytes(v) for v in records['id']])
+        try:
+            frame.to_parquet(path, index=False)
+        except ImportError as e:
+            raise RuntimeError("Parquet archives need pyarrow; use a .npy path instead") from e
+    else:
+        np.save(path, records, allow_pickle=False)
+
+
+def load_archive(path):
+    """
+    Records from an archive; .npy files are memory-mapped, not read.
+    """
+    if path.endswith(".parquet"):
+        frame = pd.read_parquet(path)
+        records = np.zeros(len(frame), dtype=ARCHIVE_DTYPE)
+        records['id'] = np.frombuffer(b"".join(frame['id']), dtype='V16')
+        for name in ARCHIVE_DTYPE.names[1:]:
+            records[name] = frame[name].to_numpy()
+        return records
+    records = np.load(path, mmap_mode='r', allow_pickle=False)
+    if records.dtype != ARCHIVE_DTYPE:
+        raise ValueError(f"{path} is not a response archive (dtype {records.dtype})")
+    return records
+
+
+def export_archive(source, dest, chunksize=10000):
+    from report import iter_chunks
+
+    parts = [pack(chunk) for chunk in iter_chunks(source, chunksize)]
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype=ARCHIVE_DTYPE)
+    write_archive(records, dest)
+    return len(records)
+
+
+def import_archive(path, dest, chunksize=10000):
+    """
+    Restore an archive into a sqlite/csv backend, with scores recomputed.
+    Rows already in a sqlite backend are skipped (Submission_ID is unique there).
+    """
+    from batch_scoring import score_batch
+    from persistence import local_backend, submission_columns
+
+    backend = local_backend('sqlite' if dest.endswith((".db", ".sqlite")) else 'csv', dest)
+    records = load_archive(path)
+    for start in range(0, len(records), chunksize):
+        df = unpack(records[start:start + chunksize])
+        scored = score_batch(df)
+        for cat in ('Physical', 'Mental'):
+            df[f'{cat}_Score'] = scored[f'{cat}_Score'].astype(str) + "/" + scored[f'{cat}_Max'].astype(str)
+            df[f'{cat}_Level'] = scored[f'{cat}_Level']
+        df = df.astype(object).where(df.notna(), "")
+        backend.append_many(df[[c for c in submission_columns() if c in df]].to_dict('records'))
+    return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="pack stored responses into an archive")
+    p.add_argument("source", help="CSV export, SQLite database or spool file")
+    p.add_argument("dest", help="archive path (.npy or .parquet)")
+    p.add_argument("--chunksize", type=int, default=10000)
+    p = sub.add_parser("import", help="restore an archive into a sqlite/csv backend")
+    p.add_argument("archive")
+    p.add_argument("dest", help="backend file (.db/.sqlite or .csv)")
+    p.add_argument("--chunksize", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        n = export_archive(args.source, args.dest, args.chunksize)
+        print(f"Archived {n} responses into {args.dest} ({ARCHIVE_DTYPE.itemsize} bytes each)")
+    else:
+        n = import_archive(args.archive, args.dest, args.chunksize)
+        print(f"Imported {n} responses into {args.dest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import data
+
+# BMI category codes (same bands and order as utils.calculate_bmi)
+BMI_NOT_GIVEN = -1
+BMI_INCOMPLETE, BMI_UNDER, BMI_NORMAL, BMI_OVER, BMI_OBESE_1, BMI_OBESE_2 = range(6)
+BMI_CATEGORY_NAMES = {
+    BMI_NOT_GIVEN: "",
+    BMI_INCOMPLETE: "ข้อมูลไม่สมบูรณ์",
+    BMI_UNDER: "Underweight",
+    BMI_NORMAL: "Normal",
+    BMI_OVER: "Overweight",
+    BMI_OBESE_1: "Obese I",
+    BMI_OBESE_2: "Obese II",
+}
+_BMI_TEXT = {
+    BMI_UNDER: "น้ำหนักต่ำกว่าเกณฑ์ (Underweight)",
+    BMI_NORMAL: "น้ำหนักปกติ (Normal)",
+    BMI_OVER: "น้ำหนักเกิน (Overweight)",
+    BMI_OBESE_1: "อ้วนระดับ 1 (Obese I)",
+    BMI_OBESE_2: "อ้วนระดับ 2 (Obese II)",
+}
+_BMI_SCORE = np.array([0, 1, 3, 2, 1, 0])
+_BMI_SEVERITY = np.array([1, 2, 1, 2, 3, 3])
+_BMI_MAX = np.array([0, 3, 3, 3, 3, 3])
+
+# calculate_bmi uses closed bands (18.5-22.9, 23.0-24.9, 25.0-29.9); BMI values in the
+# small gaps between them (and NaN) fall through to Obese II. Nudging each upper edge
+# up by one ulp turns that into left-closed bins for np.digitize.
+_BMI_EDGES = np.array([18.5, np.nextafter(22.9, np.inf), 23.0,
+                       np.nextafter(24.9, np.inf), 25.0, np.nextafter(29.9, np.inf)])
+_BMI_BIN_CODE = np.array([BMI_UNDER, BMI_NORMAL, BMI_OBESE_2, BMI_OVER,
+                          BMI_OBESE_2, BMI_OBESE_1, BMI_OBESE_2])
+
+BmiArrays = namedtuple('BmiArrays', 'bmi score category severity max ideal_min ideal_max')
+
+
+def calculate_bmi_array(weight, height):
+    """
+    Array version of utils.calculate_bmi for weight (kg) and height (cm) columns.
+    Rows with a NaN/0 weight or height get category BMI_NOT_GIVEN and score/max 0
+    (calculate_results skips BMI for those). Text is produced only by bmi_labels().
+    """
+    weight = np.asarray(weight, dtype=float)
+    height = np.asarray(height, dtype=float)
+    given = (np.nan_to_num(weight) != 0) & (np.nan_to_num(height) != 0)
+
+    height_m = height / 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bmi = weight / (height_m ** 2)
+    code = np.where(height <= 0, BMI_INCOMPLETE, _BMI_BIN_CODE[np.digitize(bmi, _BMI_EDGES)])
+    code = np.where(given, code, BMI_NOT_GIVEN)
+
+    lookup = np.maximum(code, 0)
+    return BmiArrays(
+        bmi=bmi,
+        score=np.where(given, _BMI_SCORE[lookup], 0),
+        category=code,
+        severity=np.where(given, _BMI_SEVERITY[lookup], 0),
+        max=np.where(given, _BMI_MAX[lookup], 0),
+        ideal_min=18.5 * (height_m ** 2),
+        ideal_max=22.9 * (height_m ** 2),
+    )
+
+
+def bmi_category(weight, height):
+    return calculate_bmi_array(weight, height).category
+
+
+def bmi_labels(result):
+    """
+    The advice strings calculate_bmi would return, formatted on demand from a BmiArrays.
+    """
+    labels = []
+    for bmi, code, lo, hi in zip(result.bmi, result.category, result.ideal_min, result.ideal_max):
+        if code == BMI_NOT_GIVEN:
+            labels.append("")
+        elif code == BMI_INCOMPLETE:
+            labels.append("ข้อมูลไม่สมบูรณ์")
+        elif code == BMI_NORMAL:
+            labels.append(f"BMI {bmi:.1f}: {_BMI_TEXT[code]}")
+        else:
+            ideal_text = f" (น้ำหนักที่เหมาะสมสำหรับความสูงของคุณคือ {lo:.1f} - {hi:.1f} กก.)"
+            labels.append(f"BMI {bmi:.1f}: {_BMI_TEXT[code]}{ideal_text}")
+    return labels
+
+
+# Health level codes (index into HEALTH_LABELS); HEALTH_NA when max <= 0
+HEALTH_NA = -1
+HEALTH_LABELS = ("ควรปรับปรุง (Needs Improvement)", "ปานกลาง (Fair)", "ดี (Good)", "ดีเยี่ยม (Excellent)")
+_HEALTH_EDGES = np.array([40, 60, 80])
+
+
+def health_level_array(score, max_score):
+    """
+    Array version of utils.get_health_label, returning level codes.
+    """
+    score = np.asarray(score, dtype=float)
+    max_score = np.asarray(max_score, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = (score / max_score) * 100
+    return np.where(max_score <= 0, HEALTH_NA, np.digitize(pct, _HEALTH_EDGES))
+
+
+def health_labels(codes):
+    return [("N/A" if c == HEALTH_NA else HEALTH_LABELS[c]) for c in codes]
+
+
+# Score matrix per question bank: row = question, column = choice index (padded with 0)
+BankArrays = namedtuple('BankArrays', 'question_ids n_choices score_matrix max_scores is_physical')
+_arrays_by_digest = {}
+
+
+def bank_arrays(bank=None):
+    bank = bank or data.current_bank()
+    arrays = _arrays_by_digest.get(bank.digest)
+    if arrays is None:
+        qs = bank.questions
+        n_choices = np.array([len(q.choice_scores) for q in qs])
+        matrix = np.zeros((len(qs), n_choices.max()), dtype=np.int64)
+        for i, q in enumerate(qs):
+            matrix[i, :len(q.choice_scores)] = q.choice_scores
+        arrays = _arrays_by_digest[bank.digest] = BankArrays(
+            [q.id for q in qs], n_choices, matrix,
+            np.array([q.max_score for q in qs], dtype=np.int64),
+            np.array([q.category == 'Physical' for q in qs]))
+    return arrays
+
+
+# For the bank loaded at import; rows of other versions need bank_arrays(require_bank(version))
+QUESTION_IDS = bank_arrays(data.bank).question_ids
+SCORE_MATRIX = bank_arrays(data.bank).score_matrix
+
+
+def answer_matrix(df, bank=None):
+    """
+    Choice indices (0-based, -1 = unanswered) from the 1-based Q<id> columns written by save_to_google_sheet.
+    """
+    arrays = bank_arrays(bank)
+    question_ids = arrays.question_ids
+    idx = np.full((len(df), len(question_ids)), -1, dtype=np.int64)
+    for j, qid in enumerate(question_ids):
+        col = f"Q{qid}"
+        if col not in df:
+            continue
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+        answered = ~np.isnan(values)
+        idx[answered, j] = values[answered].astype(np.int64) - 1
+    bad = (idx < -1) | (idx >= arrays.n_choices)
+    if bad.any():
+        row, j = np.argwhere(bad)[0]
+        raise ValueError(f"Row {row}: answer {idx[row, j] + 1} is out of range for Q{question_ids[j]}")
+    return idx
+
+
+def question_scores(df, bank=None):
+    """
+    (scores, answered): n x len(question ids) score matrix (0 where unanswered) and answered mask.
+    """
+    arrays = bank_arrays(bank)
+    idx = answer_matrix(df, bank)
+    answered = idx >= 0
+    scores = np.where(answered, arrays.score_matrix[np.arange(len(arrays.question_ids)), np.maximum(idx, 0)], 0)
+    return scores, answered
+
+
+def split_by_bank_version(df):
+    """
+    [(bank, rows)] when df mixes rows answered against other question bank versions, else None.
+    Rows without a Bank_Version are taken to use the current bank.
+    """
+    if 'Bank_Version' not in df:
+        return None
+    current = data.current_bank().version
+    versions = pd.to_numeric(df['Bank_Version'], errors='coerce').fillna(current).astype(int)
+    if (versions == current).all():
+        return None
+    groups = []
+    for version, rows in df.groupby(versions, sort=False):
+        groups.append((data.require_bank(version), rows))
+    return groups
+
+
+def score_batch(df, weight_col='Weight', height_col='Height', bank=None):
+    """
+    Score many stored responses at once. Matches calculate_results row by row.
+    Without an explicit bank, each row is scored against its Bank_Version.
+    Returns a DataFrame (same index as df) with score/max/level per category,
+    BMI category code and name, and gap counts.
+    """
+    if bank is None:
+        groups = split_by_bank_version(df)
+        if groups is not None:
+            return pd.concat([score_batch(rows, weight_col, height_col, bank=b) for b, rows in groups]).loc[df.index]
+
+    is_physical = bank_arrays(bank).is_physical
+    scores, answered = question_scores(df, bank)
+    maxes = np.where(answered, bank_arrays(bank).max_scores, 0)
+    is_gap = answered & (scores <= 1)
+
+    n = len(df)
+    weight = pd.to_numeric(df[weight_col], errors='coerce').to_numpy(dtype=float) if weight_col in df else np.full(n, np.nan)
+    height = pd.to_numeric(df[height_col], errors='coerce').to_numpy(dtype=float) if height_col in df else np.full(n, np.nan)
+    bmi = calculate_bmi_array(weight, height)
+    bmi_code = bmi.category
+    has_bmi = bmi_code != BMI_NOT_GIVEN
+
+    out = pd.DataFrame(index=df.index)
+    out['Physical_Score'] = scores[:, is_physical].sum(axis=1) + bmi.score
+    out['Physical_Max'] = maxes[:, is_physical].sum(axis=1) + bmi.max
+    out['Mental_Score'] = scores[:, ~is_physical].sum(axis=1)
+    out['Mental_Max'] = maxes[:, ~is_physical].sum(axis=1)
+    for cat in ('Physical', 'Mental'):
+        codes = health_level_array(out[f'{cat}_Score'].to_numpy(), out[f'{cat}_Max'].to_numpy())
+        out[f'{cat}_Level'] = health_labels(codes)
+    out['BMI_Category'] = bmi_code
+    out['BMI_Category_Name'] = pd.Series(bmi_code, index=df.index).map(BMI_CATEGORY_NAMES)
+    out['Physical_Gaps'] = is_gap[:, is_physical].sum(axis=1) + (has_bmi & (bmi.score <= 1))
+    out['Mental_Gaps'] = is_gap[:, ~is_physical].sum(axis=1)
+    return out
@@ -0,0 +1,61 @@
+"""
+Size and load time of the .npy response archive vs the CSV export it replaces.
+
+    python benchmarks/bench_archive.py [n_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from archive import export_archive, load_archive
+from data import questions
+from persistence import submission_columns
+
+
+def synthetic_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Submission_ID': [uuid.UUID(int=int(x)).hex for x in rng.integers(1, 2**62, n)],
+        'Timestamp': pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 3e7, n), unit="s"),
+        'Email': "", 'Interest': "ไม่สนใจ",
+        'Weight': rng.uniform(40, 110, n).round(1), 'Height': rng.uniform(145, 195, n).round(1),
+        'Age': rng.integers(15, 80, n),
+        'Physical_Score': "12/28", 'Physical_Level': "ปานกลาง (Fair)",
+        'Mental_Score': "20/30", 'Mental_Level': "ดี (Good)", 'Bank_Version': 1,
+    })
+    df['Timestamp'] = df['Timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S")
+    for q in questions:
+        df[f"Q{q.id}"] = rng.integers(1, len(q.choice_texts) + 1, n)
+    return df[submission_columns()]
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(n=200_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, npy_path = os.path.join(tmp, "r.csv"), os.path.join(tmp, "r.npy")
+        synthetic_rows(n).to_csv(csv_path, index=False)
+        export_archive(csv_path, npy_path, chunksize=50_000)
+
+        csv_load = best_of(lambda: pd.read_csv(csv_path))
+        npy_load = best_of(lambda: np.asarray(load_archive(npy_path)['answers']).sum())
+        for name, path, load in [("csv", csv_path, csv_load), ("npy", npy_path, npy_load)]:
+            print(f"{name}: {os.path.getsize(path) / n:6.1f} bytes/row, load {load * 1e3:8.1f} ms for {n} rows")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,86 @@
+"""
+Question representation and calculate_results: slotted tuples vs the original
+__dict__ class with dict choices and an advice_map keyed by score tuples.
+
+    python benchmarks/bench_calculate_results.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import questions
+from utils import calculate_results
+
+
+class LegacyQuestion:
+    # The original representation, rebuilt from the bank for comparison.
+    def __init__(self, q):
+        self.id = q.id
+        self.text = q.text
+        self.short_topic = q.short_topic
+        self.category = q.category
+        self.choices = [{'text': t, 'score': s} for t, s in zip(q.choice_texts, q.choice_scores)]
+        self.advice_map = {(s,): a for s, a in enumerate(q.advice_by_score) if a}
+        self.severity = q.severity
+
+
+legacy_questions = [LegacyQuestion(q) for q in questions]
+
+
+def calculate_results_original(answers):
+    # The original implementation (question part only).
+    results = {'Physical': {'score': 0, 'max': 0}, 'Mental': {'score': 0, 'max': 0}}
+    strengths, gaps = [], []
+    for q in legacy_questions:
+        choice_idx = answers.get(q.id)
+        if choice_idx is None: continue
+        score = q.choices[choice_idx]['score']
+        results[q.category]['score'] += score
+        results[q.category]['max'] += max(c['score'] for c in q.choices)
+        advice = ""
+        for score_range, text in q.advice_map.items():
+            if score in score_range:
+                advice = text
+                break
+        item = {'topic': q.short_topic, 'category': q.category, 'score': score,
+                'advice': advice, 'severity': q.severity}
+        (gaps if score <= 1 else strengths).append(item)
+    gaps.sort(key=lambda x: x['severity'], reverse=True)
+    return results, strengths, gaps
+
+
+def container_bytes(obj, seen=None):
+    """
+    Memory of the containers (objects, dicts, lists, tuples); the shared str/int leaves are not counted.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, (str, int)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        children = [*obj.keys(), *obj.values()]
+    elif isinstance(obj, (list, tuple)):
+        children = obj
+    elif hasattr(obj, '__dict__'):
+        children = [obj.__dict__]
+    else:
+        children = []
+    return size + sum(container_bytes(c, seen) for c in children)
+
+
+def main(number=20000):
+    answers = {q.id: i % len(q.choice_texts) for i, q in enumerate(questions)}
+    assert calculate_results_original(answers) == calculate_results(answers)
+
+    for name, bank in [("original", legacy_questions), ("slotted", questions)]:
+        print(f"{name:>9}: {container_bytes(bank):6d} bytes for {len(bank)} questions")
+    for name, fn in [("original", calculate_results_original), ("slotted", calculate_results)]:
+        best = min(timeit.repeat(lambda: fn(answers), number=number, repeat=5))
+        print(f"{name:>9}: {best / number * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
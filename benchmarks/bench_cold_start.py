@@ -0,0 +1,72 @@
+"""
+Cold-start cost of the modules app.py needs to render the landing page.
+
+Runs fresh interpreters with `python -X importtime`, reports the cumulative import
+time of streamlit and of the app's own modules, and fails (exit 1) when the app
+modules pull in a forbidden heavy dependency or exceed --max-ms.
+
+    python benchmarks/bench_cold_start.py --runs 5 --max-ms 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_MODULES = ["data", "utils"]
+# Only needed from the results/final steps onward
+FORBIDDEN = ["pandas", "numpy", "streamlit_gsheets", "gspread", "charts", "persistence"]
+
+PROBE = (
+    "import sys, streamlit\n"
+    "before = set(sys.modules)\n"
+    f"import {', '.join(APP_MODULES)}\n"
+    "print(' '.join(sorted(set(sys.modules) - before)))\n"
+)
+
+
+def run_once():
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        if not name.startswith(" " * 2):  # top-level imports only
+            cumulative[name.strip()] = int(cum)
+    added = proc.stdout.split()
+    return cumulative, added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if app modules take longer (median)")
+    args = parser.parse_args()
+
+    streamlit_us, app_us, added = [], [], set()
+    for _ in range(args.runs):
+        cumulative, new_modules = run_once()
+        streamlit_us.append(cumulative.get("streamlit", 0))
+        app_us.append(sum(cumulative.get(m, 0) for m in APP_MODULES))
+        added.update(new_modules)
+
+    app_ms = statistics.median(app_us) / 1000
+    print(f"streamlit   : {statistics.median(streamlit_us) / 1000:8.1f} ms (median of {args.runs})")
+    print(f"app modules : {app_ms:8.1f} ms ({', '.join(APP_MODULES)})")
+
+    heavy = sorted(m for m in added if m.split(".")[0] in FORBIDDEN)
+    failed = False
+    if heavy:
+        print(f"FAIL: landing page imports {', '.join(heavy)}")
+        failed = True
+    if args.max_ms is not None and app_ms > args.max_ms:
+        print(f"FAIL: app modules took {app_ms:.1f} ms > {args.max_ms} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
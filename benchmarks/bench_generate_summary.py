@@ -0,0 +1,74 @@
+"""
+generate_summary worst case: every question answered with its lowest choice and an
+obese BMI, so every item is a gap. String concatenation with per-item styling vs
+the cached fragments assembled with one join.
+
+    python benchmarks/bench_generate_summary.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import questions
+from scoring import calculate_results, generate_summary, generate_strengths_html
+
+
+def generate_summary_original(gaps):
+    # The original implementation.
+    if not gaps:
+        return "สุขภาพโดยรวมของคุณอยู่ในเกณฑ์ดีเยี่ยม! ไม่มีจุดที่ต้องกังวลเป็นพิเศษ รักษาความสมดุลนี้ไว้นะครับ"
+    phys_gaps = [g for g in gaps if g['category'] == 'Physical']
+    mental_gaps = [g for g in gaps if g['category'] == 'Mental']
+    summary = "จากการวิเคราะห์ พบว่ามีบางจุดที่คุณควรหันมาดูแลใส่ใจเพิ่มขึ้น โดยเรียงลำดับตามความสำคัญครับ:<br><br>"
+
+    def format_list(item_list):
+        res = ""
+        seen = set()
+        for item in item_list:
+            if item['advice'] in seen: continue
+            seen.add(item['advice'])
+            icon = "🔴 " if item['severity'] >= 3 else "🟡 " if item['severity'] == 2 else "🔵 "
+            color = "#D32F2F" if item['severity'] >= 3 else "#F57C00" if item['severity'] == 2 else "#1976D2"
+            res += f"<div style='color: {color}; margin-bottom: 5px;'>{icon}<b>{item['topic']}:</b> {item['advice']}</div>"
+        return res
+
+    if phys_gaps:
+        summary += "<b>💪 ด้านสุขภาพกาย:</b><br>"
+        summary += format_list(phys_gaps)
+        summary += "<br>"
+    if mental_gaps:
+        summary += "<b>🧠 ด้านสุขภาพจิต:</b><br>"
+        summary += format_list(mental_gaps)
+    return summary
+
+
+def strengths_original(strengths):
+    # The original cards, one markdown string per strength.
+    return [f"""
+                <div style='background: #E8F5E9; padding: 15px; border-radius: 12px; margin-bottom: 10px; border-left: 5px solid #2E7D32;'>
+                    <b>✅ {item['topic']}</b>: {item['advice']}
+                </div>
+            """ for item in strengths]
+
+
+def main(number=20000):
+    worst = {q.id: min(range(len(q.choice_scores)), key=q.choice_scores.__getitem__) for q in questions}
+    _, _, gaps = calculate_results(worst, weight=95.0, height=170.0)
+    assert len(gaps) == len(questions) + 1
+    assert generate_summary_original(gaps) == generate_summary(gaps)
+    best = {q.id: max(range(len(q.choice_scores)), key=q.choice_scores.__getitem__) for q in questions}
+    _, strengths, _ = calculate_results(best, weight=60.0, height=170.0)
+
+    print(f"{len(gaps)} gaps, {len(strengths)} strengths")
+    for name, fn, items in [("summary original", generate_summary_original, gaps),
+                            ("summary fragments", generate_summary.__wrapped__, gaps),
+                            ("strengths original", strengths_original, strengths),
+                            ("strengths fragments", generate_strengths_html, strengths)]:
+        t = min(timeit.repeat(lambda: fn(items), number=number, repeat=5))
+        print(f"{name:>20}: {t / number * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
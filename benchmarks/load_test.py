@@ -0,0 +1,165 @@
+"""
+Simulate many people taking the assessment at once (e.g. a whole event hall).
+
+Each simulated user drives app.py through Streamlit's AppTest:
+landing -> info -> 20 assessment steps -> results -> leads -> final,
+with consent given, against an in-memory fake Sheets backend (the configured
+sheet_url is pointed at a FakeWorksheet, so use the default backend=sheets).
+
+Reports per-step latency percentiles, script runs per session, session-state
+size and end-to-end submissions/second.
+
+AppTest is not thread-safe, so concurrency comes from worker processes: each of
+--concurrency workers drives its share of sessions back to back against its own
+fake sheet, and all workers run at the same time. The spool, live aggregates and
+leads files go to a temporary directory, not the repository.
+
+    python benchmarks/load_test.py --users 200 --concurrency 50
+"""
+import argparse
+import os
+import pickle
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from multiprocessing import Pool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+from config import get_storage_config
+from storage import SheetsAppendWriter, set_sheet_writer
+from tests.fakes import FakeWorksheet
+
+APP_PATH = os.path.join(ROOT, "app.py")
+
+# Counts every script execution (including st.rerun) in session state, then runs the real app.
+WRAPPER = f"""
+import runpy
+import streamlit as st
+st.session_state["_load_test_runs"] = st.session_state.get("_load_test_runs", 0) + 1
+runpy.run_path({APP_PATH!r}, run_name="__main__")
+"""
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def _click_primary(at):
+    next(b for b in at.button if b.proto.type == "primary").click()
+
+
+def run_session(seed, timings):
+    rng = random.Random(seed)
+    at = AppTest.from_string(WRAPPER, default_timeout=120)
+
+    def timed(step, action=None):
+        if action:
+            action()
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"{step}: {at.exception[0].value}")
+        timings[step].append(elapsed)
+
+    timed("load")
+    timed("landing", lambda: _click_primary(at))
+    timed("info", lambda: _click_primary(at))
+    while at.session_state.step == "assessment":
+        radio = at.radio[0]
+        radio.set_value(rng.choice(radio.options))
+        timed("assessment", lambda: _click_primary(at))
+    timed("results", lambda: _click_primary(at))
+
+    def fill_leads():
+        at.checkbox[0].check()
+        _click_primary(at)
+
+    timed("leads", fill_leads)
+    assert at.session_state.step == "final"
+
+    state = {k: at.session_state[k] for k in ("step", "q_idx", "answers", "weight", "height", "age",
+                                              "consent", "interest", "email", "results_memo", "save_key")
+             if k in at.session_state}
+    return at.session_state["_load_test_runs"], len(pickle.dumps(state))
+
+
+def run_worker(job):
+    seeds, sheet_latency, trace_memory, workdir = job
+    # Relative data files (spool, aggregates, leads) land in the run's temporary directory
+    os.chdir(workdir)
+    # Imported up front: the finalize thread imports them lazily, and AppTest only puts
+    # the script directory on sys.path while a script runs
+    import aggregates, leads, persistence, spool, submit_queue  # noqa: F401
+    ws = FakeWorksheet(latency=sheet_latency)
+    set_sheet_writer(get_storage_config()['sheet_url'], SheetsAppendWriter(ws))
+    if trace_memory:
+        tracemalloc.start()
+
+    timings = defaultdict(list)
+    started = time.time()
+    mem_before = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    sessions = [run_session(seed, timings) for seed in seeds]
+    mem_after = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+
+    persistence.wait_for_submissions()
+    submit_queue.get_submission_queue().flush()
+    return dict(timings), sessions, len(ws.rows) - 1, started, time.time(), mem_after - mem_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--sheet-latency", type=float, default=0.05, help="seconds per fake Sheets API call")
+    parser.add_argument("--trace-memory", action="store_true", help="also report traced heap growth per session (slow)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="load_test_") as workdir:
+        os.environ['AGGREGATES_PATH'] = os.path.join(workdir, "live_aggregates.json")
+        os.environ['LEADS_PATH'] = os.path.join(workdir, "leads.db")
+        jobs = [(list(range(i, args.users, args.concurrency)), args.sheet_latency, args.trace_memory, workdir)
+                for i in range(min(args.concurrency, args.users))]
+        with Pool(len(jobs)) as pool:
+            results = pool.map(run_worker, jobs)
+
+    timings = defaultdict(list)
+    sessions, submitted, heap = [], 0, 0
+    for worker_timings, worker_sessions, rows, _, _, heap_growth in results:
+        for step, values in worker_timings.items():
+            timings[step].extend(values)
+        sessions.extend(worker_sessions)
+        submitted += rows
+        heap += heap_growth
+    wall = max(r[4] for r in results) - min(r[3] for r in results)
+
+    print(f"users={args.users} concurrency={len(jobs)} wall={wall:.1f}s")
+    print(f"{'step':<12}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for step in ("load", "landing", "info", "assessment", "results", "leads"):
+        values = timings[step]
+        print(f"{step:<12}{len(values):>7}" + "".join(f"{percentile(values, p) * 1000:>10.1f}" for p in (50, 95, 99)))
+    print(f"script runs / session : {statistics.mean(r for r, _ in sessions):.1f}")
+    print(f"session state / session: {statistics.mean(b for _, b in sessions) / 1024:.1f} KiB (pickled)")
+    if args.trace_memory:
+        print(f"heap growth / session : {heap / args.users / 1024:.1f} KiB")
+    print(f"rows in fake sheet    : {submitted}/{args.users}")
+    print(f"submissions / second  : {submitted / wall:.1f}")
+    if submitted != args.users:
+        # Failed saves are spooled instead, which would otherwise pass for throughput
+        sys.exit(f"error: {submitted} of {args.users} rows reached the fake sheet")
+
+
+if __name__ == "__main__":
+    main()
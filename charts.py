@@ -0,0 +1,129 @@
+import plotly.graph_objects as go
+import plotly.io as pio
+from data import category_max
+from metrics import timed
+from scoring import calculate_bmi
+from collections import OrderedDict
+import json
+import threading
+
+
+def _build_bar_chart(p_score, p_max, m_score, m_max):
+    """
+    Horizontal Bar Chart for Physical vs Mental scores
+    """
+    p_max = p_max or 1
+    m_max = m_max or 1
+    
+    phys_pct = (p_score / p_max) * 100
+    ment_pct = (m_score / m_max) * 100
+    
+    current_values = [phys_pct, ment_pct]
+    categories = ['Physical Health (กาย)', 'Mental Health (ใจ)']
+    colors = ['#2ECC71', '#3498DB'] 
+
+    fig = go.Figure(go.Bar(
+        x=current_values,
+        y=categories,
+        orientation='h',
+        text=[f"{v:.1f}%" for v in current_values],
+        textposition='auto',
+        marker_color=colors,
+        marker_line_width=0,
+        opacity=0.9
+    ))
+
+    fig.update_layout(
+        xaxis=dict(
+            range=[0, 100],
+            title="Score (%)",
+            tickfont=dict(family='Prompt', size=12, color='black'),
+            title_font=dict(family='Prompt', size=14, color='black'),
+            showgrid=True,
+            gridcolor='#E0E0E0',
+            fixedrange=True
+        ),
+        yaxis=dict(
+            tickfont=dict(family='Prompt', size=16, color='black', weight='bold'),
+            fixedrange=True
+        ),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=20, r=20, t=30, b=30),
+        height=300, 
+        showlegend=False,
+        dragmode=False
+    )
+    
+    return fig
+
+
+# Serialized bar charts keyed on (p_score, p_max, m_score, m_max). Scores are small
+# bounded integers, so the whole reachable space fits (~7 KB of JSON per entry).
+BAR_CHART_CACHE_SIZE = 2048
+_bar_chart_cache = OrderedDict()
+_bar_chart_lock = threading.Lock()
+bar_chart_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def bar_chart_json(category_scores):
+    """
+    Plotly JSON for create_bar_chart, served from a bounded LRU cache.
+    """
+    key = (category_scores['Physical']['score'], category_scores['Physical']['max'],
+           category_scores['Mental']['score'], category_scores['Mental']['max'])
+    with _bar_chart_lock:
+        spec = _bar_chart_cache.get(key)
+        if spec is not None:
+            _bar_chart_cache.move_to_end(key)
+            bar_chart_cache_stats['hits'] += 1
+            return spec
+        bar_chart_cache_stats['misses'] += 1
+
+    spec = pio.to_json(_build_bar_chart(*key), validate=False)
+    with _bar_chart_lock:
+        _bar_chart_cache[key] = spec
+        _bar_chart_cache.move_to_end(key)
+        while len(_bar_chart_cache) > BAR_CHART_CACHE_SIZE:
+            _bar_chart_cache.popitem(last=False)
+    return spec
+
+
+@timed("create_bar_chart")
+def create_bar_chart(category_scores):
+    """
+    Horizontal Bar Chart for Physical vs Mental scores.
+    Rebuilt from the cached JSON without re-validation (it came from a validated figure),
+    which is an order of magnitude cheaper than constructing it.
+    """
+    return go.Figure(json.loads(bar_chart_json(category_scores)), _validate=False)
+
+
+def reachable_score_keys():
+    """
+    Every (p_score, p_max, m_score, m_max) a fully answered assessment can produce.
+    """
+    bmi_max = calculate_bmi(60, 170)[3]
+    keys = []
+    for p_max in (category_max['Physical'], category_max['Physical'] + bmi_max):
+        for p_score in range(p_max + 1):
+            for m_score in range(category_max['Mental'] + 1):
+                keys.append((p_score, p_max, m_score, category_max['Mental']))
+    return keys
+
+
+def warm_bar_chart_cache(background=True):
+    """
+    Precompute the chart for every reachable score combination (optional, at startup).
+    """
+    def run():
+        for p_score, p_max, m_score, m_max in reachable_score_keys():
+            bar_chart_json({'Physical': {'score': p_score, 'max': p_max},
+                            'Mental': {'score': m_score, 'max': m_max}})
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="chart-warmup", daemon=True)
+    thread.start()
+    return thread
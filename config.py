@@ -0,0 +1,64 @@
+"""
+Storage settings. Read from the [storage] table in .streamlit/secrets.toml,
+overridden by environment variables:
+
+    [storage]
+    backend = "sqlite"            # STORAGE_BACKEND: "sheets" | "sqlite" | "csv"
+    path = "assessment_results.db"  # STORAGE_PATH: file for the sqlite/csv backends
+    mirror = "sheets"             # STORAGE_MIRROR: optional remote copy ("" = none)
+    sheet_url = "https://..."     # SHEET_URL
+    sheets_max_in_flight = 4      # SHEETS_MAX_IN_FLIGHT: concurrent Sheets API calls per process
+    aggregates_path = "live_aggregates.json"  # AGGREGATES_PATH: running totals ("" = off)
+    shared_state = "shared_state.db"  # SHARED_STATE_PATH: sessions + outbox shared by all
+                                      # worker processes ("" = per-process, the default)
+    leads_path = "leads.db"       # LEADS_PATH: board game emails, kept out of the results ("" = off)
+"""
+import os
+
+DEFAULT_SHEET_URL = "https://docs.google.com/spreadsheets/d/1ET8CJvJ2gq-lUfLP9NQNyNvy67JLd2NsjRwLuWAYLo4/edit?usp=sharing"
+
+DEFAULTS = {
+    'backend': 'sheets',
+    'path': '',
+    'mirror': '',
+    'sheet_url': DEFAULT_SHEET_URL,
+    'sheets_max_in_flight': 4,
+    'aggregates_path': 'live_aggregates.json',
+    'shared_state': '',
+    'leads_path': 'leads.db',
+}
+DEFAULT_PATHS = {'sqlite': 'assessment_results.db', 'csv': 'assessment_results.csv'}
+
+_ENV = {
+    'backend': 'STORAGE_BACKEND',
+    'path': 'STORAGE_PATH',
+    'mirror': 'STORAGE_MIRROR',
+    'sheet_url': 'SHEET_URL',
+    'sheets_max_in_flight': 'SHEETS_MAX_IN_FLIGHT',
+    'aggregates_path': 'AGGREGATES_PATH',
+    'shared_state': 'SHARED_STATE_PATH',
+    'leads_path': 'LEADS_PATH',
+}
+
+
+def _secrets_section():
+    try:
+        import streamlit as st
+        return dict(st.secrets.get("storage", {}))
+    except Exception:
+        return {}
+
+
+def get_storage_config(environ=os.environ, secrets=None):
+    config = dict(DEFAULTS)
+    config.update(_secrets_section() if secrets is None else secrets)
+    for key, var in _ENV.items():
+        if environ.get(var) is not None:
+            config[key] = environ[var]
+    if not config['path']:
+        config['path'] = DEFAULT_PATHS.get(config['backend'], '')
+    if config['backend'] not in ('sheets', 'sqlite', 'csv'):
+        raise ValueError(f"Unknown storage backend: {config['backend']!r}")
+    if config['mirror'] not in ('', 'sheets'):
+        raise ValueError(f"Unknown storage mirror: {config['mirror']!r}")
+    return config
@@ -0,0 +1,53 @@
+import math
+import random
+
+import pandas as pd
+import pytest
+
+from data import questions
+
+# Manual script for the old radar-chart API (python test_logic.py); it exits at import under pytest
+collect_ignore = ["test_logic.py"]
+
+
+def _random_responses(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        row = {f"Q{q.id}": rng.randint(1, len(q.choice_texts)) for q in questions if rng.random() > 0.1}
+        row['Height'] = rng.choice([0, 150.0, 170.0, 182.5, -5.0, None])
+        # BMI values on and between band edges, e.g. 22.95 falls through to Obese II
+        row['Weight'] = rng.choice([None, 0, 45.0, 60.0, 66.3, 72.0, 95.0, -3.0])
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _scalar_results(df):
+    """
+    (index, calculate_results(...)) for every row of a stored-responses frame, scored one by one.
+    """
+    from scoring import calculate_results
+
+    for i, row in df.iterrows():
+        answers = {q.id: int(row[f"Q{q.id}"]) - 1 for q in questions
+                   if f"Q{q.id}" in row and not math.isnan(row[f"Q{q.id}"])}
+        weight = None if math.isnan(row['Weight']) else row['Weight']
+        height = None if math.isnan(row['Height']) else row['Height']
+        yield i, calculate_results(answers, weight=weight, height=height)
+
+
+@pytest.fixture
+def random_responses():
+    """
+    random_responses(n, seed=0): a frame of stored rows (1-based Q<id>, Weight, Height) covering
+    unanswered questions and every BMI band edge.
+    """
+    return _random_responses
+
+
+@pytest.fixture
+def scalar_results():
+    """
+    scalar_results(df): the row-by-row calculate_results oracle for vectorized paths.
+    """
+    return _scalar_results
@@ -1,222 +1,288 @@
-class Question:
-    def __init__(self, id, text, short_topic, category, choices, advice_map, severity=1): 
-        self.id = id
-        self.text = text
-        self.short_topic = short_topic
-        self.category = category # 'Physical' or 'Mental'
-        self.choices = choices
-        self.advice_map = advice_map
-        self.severity = severity # 1=Normal, 2=Important, 3=Critical
-
-# --- Physical Questions (สุขภาพกาย) ---
-physical_questions = [
-    Question(1, "ในรอบสัปดาห์ที่ผ่านมา คุณนอนหลับวันละกี่ชั่วโมง?", "ชั่วโมงการนอน", 'Physical', [
-        {'text': 'น้อยกว่า 5 ชม.', 'score': 0},
-        {'text': '5-6 ชม.', 'score': 1},
-        {'text': '7-8 ชม.', 'score': 2},
-        {'text': 'มากกว่า 9 ชม.', 'score': 3}
-    ], {
-        (0,): "การนอนน้อยกว่า 5 ชม. เพิ่มความเสี่ยงต่อโรคหัวใจและสมองล้า แนะนำให้ลองปรับเวลานอนใหม่นะครับ",
-        (1,): "ชั่วโมงการนอนยังไม่สมดุล ลองปรับให้ได้ 7-8 ชม. เพื่อการฟื้นฟูร่างกายที่มีประสิทธิภาพสูงสุดครับ",
-        (2,): "เยี่ยมมาก! การนอนของคุณอยู่ในเกณฑ์ตามมาตรฐานสุขภาพครับ",
-        (3,): "นอนมากกว่า 9 ชม. อาจทำให้รู้สึกเฉื่อยชา ลองสังเกตว่ามีการหยุดหายใจขณะหลับหรือความเครียดแฝงหรือไม่นะครับ"
-    }, severity=3), 
-
-    Question(2, "คุณภาพการนอนหลับของคุณเป็นอย่างไร? (หลับลึก/ตื่นกลางดึก)", "คุณภาพการนอน", 'Physical', [
-        {'text': 'หลับยากมาก/ตื่นบ่อย (4-5 ครั้ง)', 'score': 0},
-        {'text': 'หลับไม่สนิท ตื่นบ้าง (2-3 ครั้ง)', 'score': 1},
-        {'text': 'ค่อนข้างดี ตื่นเล็กน้อยหลับต่อได้', 'score': 2},
-        {'text': 'หลับสนิทตลอดคืน', 'score': 3}
-    ], {
-        (0, 1): "คุณภาพการนอนน่าเป็นห่วง ลองงดหน้าจอ 1 ชม. ก่อนนอนและปรับห้องให้มืดสนิทดูนะครับ",
-        (2, 3): "คุณภาพการนอนของคุณดีมากครับ ซึ่งเป็นพื้นฐานสำคัญของสุขภาพที่ดี"
-    }, severity=3),
-
-    Question(3, "คุณออกกำลังกายหรือเคลื่อนไหวร่างกาย (เช่น เดินเร็ว, วิ่ง, ยกเวท) บ่อยแค่ไหน?", "การออกกำลังกาย", 'Physical', [
-        {'text': 'แทบไม่ได้ออกเลย / นั่งทั้งวัน', 'score': 0},
-        {'text': '1–2 วัน/สัปดาห์', 'score': 1},
-        {'text': '3–5 วัน/สัปดาห์', 'score': 2},
-        {'text': 'มากกว่า 6 วัน/สัปดาห์', 'score': 3}
-    ], {
-        (0,): "ร่างกายต้องการการเคลื่อนไหว ลองเริ่มจากเดินเร็วๆ วันละ 20-30 นาที ให้หัวใจได้ทำงานบ้างนะครับ",
-        (1,): "พยายามเพิ่มความสม่ำเสมอเป็น 3-5 วันต่อสัปดาห์ เพื่อผลลัพธ์ที่ชัดเจนขึ้นครับ",
-        (2,): "ยอดเยี่ยม! คุณรักษาวินัยการออกกำลังกายได้ดีมากครับ",
-        (3,): "ระวัง Over-training นะครับ ควรมีวันพักผ่อน (Rest Day) เพื่อให้กล้ามเนื้อได้ฟื้นฟูและลดความเสี่ยงการบาดเจ็บครับ"
-    }, severity=3),
-
-    Question(4, "เน้นทานอาหารรสจัด เช่น หวาน มัน เค็ม ของทอดหรืออาหารแปรรูปบ่อยแค่ไหน?", "พฤติกรรมการกิน", 'Physical', [
-        {'text': 'ทานรสจัด/ของทอด แทบทุกมื้อ', 'score': 0},
-        {'text': 'ทานบ่อย 4–5 วันต่อสัปดาห์', 'score': 1},
-        {'text': 'ทานบ้าง 1–3 วันต่อสัปดาห์', 'score': 2},
-        {'text': 'ทานคลีน หรืออาหารสุขภาพเกือบทุกมื้อ', 'score': 3}
-    ], {
-        (0, 1): "อาหารรสจัดและไขมันสูงเสี่ยงโรค NCDs ระยะยาว ลองลดการปรุงแต่งลงครึ่งหนึ่งดูนะครับ",
-        (2,): "คุณมีการคุมอาหารที่สมดุลดีแล้วครับ ทานอร่อยได้แต่พอดี",
-        (3,): "คุณดูแลเรื่องโภชนาการได้ดีมากครับ แต่อย่าลืมเดินสายกลางให้ทานได้ครบ 5 หมู่และไม่เครียดจนเกินไปนะครับ"
-    }, severity=2),
-
-    Question(5, "ปริมาณน้ำเปล่าที่คุณดื่มในแต่ละวัน (โดยประมาณ)?", "การดื่มน้ำ", 'Physical', [
-        {'text': 'น้อยมาก (1-3 แก้ว)', 'score': 0},
-        {'text': 'ปานกลาง (4-6 แก้ว)', 'score': 1},
-        {'text': 'เพียงพอ (8-10 แก้ว หรือ 1.5-2 ลิตร)', 'score': 2},
-        {'text': 'ดื่มเยอะมาก (> 3 ลิตร)', 'score': 3}
-    ], {
-        (0, 1): "การขาดน้ำทำให้เลือดข้นและสมองล้า ลองพกขวดน้ำติดตัวและจิบให้บ่อยขึ้นนะครับ",
-        (2,): "ปริมาณน้ำเหมาะสมแล้วครับ สุขภาพผิวและการไหลเวียนเลือดจะดี",
-        (3,): "คุณดื่มน้ำเยอะมาก (มากกว่า 3 ลิตร) หากไม่ได้ออกกำลังกายหนัก ลองสังเกตว่ามีอาการปัสสาวะบ่อยหรือผิดปกติร่วมด้วยไหมนะครับ"
-    }, severity=2),
-
-    Question(6, "คุณรับประทานอาหารเช้าเป็นประจำหรือไม่?", "อาหารเช้า", 'Physical', [
-        {'text': 'ไม่ทานเลย / แค่กาแฟ', 'score': 0},
-        {'text': 'ทานบ้าง (1-3 วัน/สัปดาห์)', 'score': 1},
-        {'text': 'ทานเป็นประจำทุกวัน', 'score': 2}
-    ], {
-        (0,): "มื้อเช้าสำคัญต่อสมองมาก การงดมื้อเช้าอาจทำให้สมองล้าระหว่างวันได้ครับ",
-        (1,): "พยายามทานมื้อเช้าให้สม่ำเสมอขึ้นอีกนิด เพื่อพลังงานที่ต่อเนื่องตลอดวันครับ",
-        (2,): "ดีมากครับ การทานมื้อเช้าช่วยกระตุ้นระบบเผาผลาญและสมองได้ดีครับ"
-    }, severity=2),
-
-    Question(7, "สุขภาพการขับถ่ายของคุณเป็นอย่างไร?", "ระบบขับถ่าย", 'Physical', [
-        {'text': 'ถ่ายยาก (ท้องผูก) / ถ่ายเหลวผิดปกติ', 'score': 0},
-        {'text': 'ไม่สม่ำเสมอ (2-3 วันครั้ง)', 'score': 1},
-        {'text': 'ปกติทุกวัน', 'score': 2}
-    ], {
-        (0, 1): "ระบบขับถ่ายสะท้อนสุขภาพลำไส้ ลองทานผักผลไม้เพิ่มไฟเบอร์และน้ำดื่มนะครับ",
-        (2,): "สุขภาพลำไส้ดีมากครับ สะท้อนถึงการดูแลอาหารการกินที่ดี"
-    }, severity=2),
-
-    Question(8, "คุณมีอาการปวดเมื่อย คอ บ่า ไหล่ (Office Syndrome) หรือไม่?", "Office Syndrome", 'Physical', [
-        {'text': 'ปวดตลอดเวลา / รุนแรง', 'score': 0},
-        {'text': 'ปวดบ้าง / พักแล้วหาย', 'score': 1},
-        {'text': 'แทบไม่ปวดเลย', 'score': 2}
-    ], {
-        (0,): "ระวังอาการเรื้อรังนะครับ ลองหาเวลาลุกยืดเหยียดทุกๆ ชั่วโมงและปรับท่านั่งดูครับ",
-        (1,): "เริ่มมีสัญญาณเตือน ลองปรับท่าทางและการวางจอคอมพิวเตอร์ให้เหมาะสมนะครับ",
-        (2,): "ร่างกายแข็งแรงดีครับ อย่าลืมรักษาสมดุลท่าทางแบบนี้ต่อไปนะครับ"
-    }, severity=2),
-    
-    Question(9, "คุณรู้สึกอ่อนเพลียระหว่างวันบ่อยแค่ไหน?", "ความอ่อนเพลีย", 'Physical', [
-        {'text': 'เพลียแทบตลอดทั้งวัน', 'score': 0},
-        {'text': 'เพลียช่วงบ่ายหลังทานข้าว', 'score': 1},
-        {'text': 'สดชื่นตลอดทั้งวัน', 'score': 2}
-    ], {
-        (0,): "ความอ่อนเพลียเรื้อรังอาจเกิดจากการพักผ่อนไม่เพียงพอหรือขาดสารอาหารบางอย่าง ลองสังเกตตัวเองนะครับ",
-        (1,): "อาการเพลียหลังอาหารเป็นเรื่องปกติ ลองลดแป้งมื้อเที่ยงลงนิดอาจช่วยได้ครับ",
-        (2,): "ระดับพลังงานดีเยี่ยมครับ พร้อมลุยงานได้เต็มประสิทธิภาพ"
-    }, severity=2),
-
-    Question(10, "โดยทั่วไป ขณะนั่งทำงาน คุณมีลักษณะท่าทางอย่างไร?", "ท่านั่งทำงาน", 'Physical', [
-        {'text': 'หลังค่อม ก้มคอ ไหล่ห่อ', 'score': 0},
-        {'text': 'นั่งไม่ตรงบ้าง แต่ยังปรับได้', 'score': 1},
-        {'text': 'หลังตรง ศีรษะตรง เท้าวางราบ', 'score': 2}
-    ], {
-        (0,): "ท่านั่งที่ไม่เหมาะสมจะส่งผลเสียต่อกระดูกสันหลังในระยะยาว ปรับเปลี่ยนท่าทางด่วนนะครับ!",
-        (1,): "ยังพอปรับได้ครับ พยายามเตือนตัวเองให้นั่งหลังตรงขึ้นและจัดโต๊ะทำงานใหม่นะครับ",
-        (2,): "ท่านั่งถูกต้องตามหลักการยศาสตร์ ช่วยลดความเสี่ยง Office Syndrome ได้ดีเยี่ยมครับ"
-    }, severity=3),
-]
-
-# --- Mental Questions (สุขภาพจิต) ---
-mental_questions = [
-    Question(11, "เมื่อเจอเรื่องเครียดหรือปัญหาหนักใจ วิธีรับมือของคุณคือ?", "การระบายความเครียด", 'Mental', [
-        {'text': 'เก็บกดไว้คนเดียว', 'score': 0},
-        {'text': 'พยายามเก็บไว้ แต่อึดอัด', 'score': 1},
-        {'text': 'จัดการได้ แต่ใช้เวลา', 'score': 2},
-        {'text': 'พูดคุยระบาย/หากิจกรรมผ่อนคลาย', 'score': 3}
-    ], {
-        (0, 1): "การแบกโลกไว้คนเดียวหนักเกินไปเสมอครับ การได้ระบายออกบ้างจะช่วยเบาใจได้มาก",
-        (2, 3): "คุณมีวิธีจัดการอารมณ์ที่ดีเยี่ยมครับ การรู้เท่าทันอารมณ์ตนเองสำคัญมาก"
-    }, severity=3),
-
-    Question(12, "เมื่อทำผิดพลาด คุณมักจะบอกกับตัวเองว่าอย่างไร?", "การให้อภัยตัวเอง", 'Mental', [
-        {'text': 'โทษตัวเองซ้ำๆ', 'score': 0},
-        {'text': 'ตำหนิตัวเองบ้าง', 'score': 1},
-        {'text': 'เสียใจสั้นๆ แล้วหาแนวทางแก้ไข', 'score': 2},
-        {'text': 'มองเป็นบทเรียนและเริ่มใหม่', 'score': 3}
-    ], {
-        (0, 1): "ใจดีกับตัวเองบ้างนะครับ ทุกคนผิดพลาดได้ อย่าให้ความผิดพลาดเดียวมาตัดสินคุณค่าของคุณทั้งชีวิต",
-        (2, 3): "ทัศนคติแบบ Growth Mindset ของคุณน่าชื่นชมครับ ล้มแล้วลุกไวคือกุญแจความสำเร็จ"
-    }, severity=2),
-
-    Question(13, "ระดับความเครียดหรือความกังวลในช่วงสัปดาห์นี้?", "ระดับความเครียด", 'Mental', [
-        {'text': 'เครียดสะสมตลอดเวลา', 'score': 0},
-        {'text': 'เครียดเป็นช่วงๆ', 'score': 1},
-        {'text': 'กังวลบ้างแต่คุมได้', 'score': 2},
-        {'text': 'ผ่อนคลาย สบายใจ', 'score': 3}
-    ], {
-        (0, 1): "ความเครียดสะสมอันตรายกว่าที่คิด ลองฝึกหายใจลึกๆ หรือหาช่วงเวลาพักใจสั้นๆ ระหว่างวันนะครับ",
-        (2, 3): "สภาวะจิตใจของคุณสมดุลดีมากครับ รักษาความผ่อนคลายนี้ไว้นะครับ"
-    }, severity=3),
-
-    Question(14, "เมื่อสถานการณ์ไม่เป็นไปตามหวัง คุณควบคุมอารมณ์ได้ดีแค่ไหน?", "EQ และการคุมอารมณ์", 'Mental', [
-        {'text': 'หงุดหงิดง่าย คุมไม่อยู่', 'score': 0},
-        {'text': 'พยายามข่มใจแต่ยังรู้สึกหงุดหงิดภายใน', 'score': 1},
-        {'text': 'ควบคุมและสงบสติอารมณ์ได้ดี', 'score': 2},
-        {'text': 'เข้าใจ ปรับตัวไว ใจเย็น', 'score': 3}
-    ], {
-        (0, 1): "อารมณ์เป็นเรื่องฝึกฝนได้ครับ ลองนับ 1-10 ในใจก่อนตอบโต้ช่วยดึงสติได้เสมอ",
-        (2, 3): "คุณมีความมั่นคงทางอารมณ์สูง เป็นที่พึ่งพิงทางใจให้คนรอบข้างได้ดีครับ"
-    }, severity=2),
-
-    Question(15, "ในชีวิตประจำวัน คุณสัมผัสถึง 'ความสุขเล็กๆ' ได้บ่อยแค่ไหน?", "การมองเห็นความสุข", 'Mental', [
-        {'text': 'แทบไม่รู้สึกเลย รู้สึกเฉยชาไปหมด', 'score': 0},
-        {'text': 'นานๆ ครั้งถึงจะสังเกตเห็น', 'score': 1},
-        {'text': 'สังเกตเห็นบ้าง ทำให้ยิ้มได้', 'score': 2},
-        {'text': 'เจอเรื่องดีๆ และมีความสุขได้แทบทุกวัน', 'score': 3}
-    ], {
-        (0, 1): "ภาวะเฉยชา (Numbness) อาจเป็นสัญญาณของความเหนื่อยล้า ลองพาตัวเองไปสัมผัสสิ่งใหม่ๆ บ้างนะครับ",
-        (2, 3): "การเป็นคน 'ช่างสังเกตความสุข' คือทักษะวิเศษที่ทำให้ใจฟูได้ทุกวันครับ"
-    }, severity=2),
-
-    Question(16, "คุณมองภาพอนาคตของตัวเองไว้อย่างไร?", "เป้าหมายและพลังชีวิต", 'Mental', [
-        {'text': 'มืดมน มองไม่เห็นทาง รู้สึกหมดหวัง', 'score': 0},
-        {'text': 'ใช้ชีวิตไปวันๆ ไม่รู้จะไปทางไหน', 'score': 1},
-        {'text': 'มีเป้าหมายบ้าง แต่ไฟยังไม่ค่อยแรง', 'score': 2},
-        {'text': 'มีเป้าหมายชัดเจน และมีพลังอยากตื่นมาทำ', 'score': 3}
-    ], {
-        (0, 1): "การขาดเป้าหมายทำให้ชีวิตล่องลอย ลองตั้งเป้าหมายเล็กๆ รายวันให้สำเร็จดูครับ จะช่วยเติมไฟได้",
-        (2, 3): "ความชัดเจนในเป้าหมายคือแหล่งพลังงานชั้นดี ลุยต่อไปนะครับ!"
-    }, severity=3),
-
-    Question(17, "เสียงในใจ (Inner Voice) ของคุณ เวลาพูดกับตัวเอง มักจะเป็นแนวไหน?", "เสียงในใจ", 'Mental', [
-        {'text': 'ดุด่า ตอกย้ำความผิดพลาด ("แกมันแย่")', 'score': 0},
-        {'text': 'กดดัน จับผิดตัวเองบ่อยๆ', 'score': 1},
-        {'text': 'ตักเตือนบ้าง แต่ก็เชียร์ให้สู้ต่อ', 'score': 2},
-        {'text': 'ให้กำลังใจและเมตตาต่อตัวเอง (Self-Compassion)', 'score': 3}
-    ], {
-        (0, 1): "ลองเปลี่ยนเสียงในใจให้เป็นเหมือนเพื่อนสนิทดูนะครับ ใจดีกับตัวเองบ้าง ใจจะเบาลงเยอะ",
-        (2, 3): "คุณเป็นแรงผลักดันที่ดีที่สุดให้กับตัวเองแล้วครับ รักษาความเมตตานี้ไว้นะครับ"
-    }, severity=2),
-
-    Question(18, "เมื่อเห็นชีวิตดีๆ ของคนอื่นในโซเชีลมีเดีย คุณรู้สึกอย่างไร?", "การเปรียบเทียบในโซเชียล", 'Mental', [
-        {'text': 'รู้สึกด้อยค่า อิจฉา หรือท้อใจทันที', 'score': 0},
-        {'text': 'กดดันตัวเอง ต้องรีบทำให้ได้แบบเขา', 'score': 1},
-        {'text': 'ยินดีกับเขา แล้วกลับมาโฟกัสที่ทางของเรา', 'score': 2},
-        {'text': 'ชื่นชม และใช้เป็นแรงบันดาลใจเชิงบวก', 'score': 3}
-    ], {
-        (0, 1): "อย่าเอา 'เบื้องหน้า' ของคนอื่นมาเปรียบเทียบกับ 'เบื้องหลัง' ของเราเลยครับ ทุกคนมีเส้นทางของตัวเอง",
-        (2, 3): "คุณมีภูมิต้านทานทางใจที่ดีเยี่ยม ไม่หวั่นไหวไปกับกระแสภายนอกครับ"
-    }, severity=2),
-
-    Question(19, "ทักษะการปฏิเสธ (Say No) และการรักษาสิทธิของคุณ?", "การรักษาสิทธิ (Boundaries)", 'Mental', [
-        {'text': 'ไม่กล้าปฏิเสธเลย ยอมลำบากแทนคนอื่นตลอด', 'score': 0},
-        {'text': 'เลี่ยงๆ หนีหน้า เพราะไม่กล้าพูดตรงๆ', 'score': 1},
-        {'text': 'ปฏิเสธได้แบบนุ่มนวล แม้จะเกรงใจบ้าง', 'score': 2},
-        {'text': 'กล้าปฏิเสธตรงๆ เมื่อไม่สะดวก รักษาสิทธิได้ดี', 'score': 3}
-    ], {
-        (0, 1): "การปฏิเสธให้เป็นคือการรักษาสุขภาพใจตัวเองครับ ฝึกปฏิเสธจากเรื่องเล็กๆ ก่อนนะครับ",
-        (2, 3): "คุณจัดลำดับความสำคัญได้ดีมากครับ การมีขอบเขตที่ชัดเจนช่วยลดปัญหาความสัมพันธ์ได้"
-    }, severity=2),
-
-    Question(20, "คุณรู้สึกภูมิใจหรือเห็นคุณค่าในตัวเอง (Self-Worth) บ่อยแค่ไหน?", "การเห็นคุณค่าในตัวเอง", 'Mental', [
-        {'text': 'ไม่รู้สึกว่าตัวเองมีคุณค่าเลย (รู้สึกไร้ค่า)', 'score': 0},
-        {'text': 'นานๆ ครั้ง หรือต้องมีคนชมถึงจะรู้สึก', 'score': 1},
-        {'text': 'รู้สึกภูมิใจในสิ่งที่ทำได้เป็นบางครั้ง', 'score': 2},
-        {'text': 'เชื่อมั่นและภูมิใจในตัวเองสม่ำเสมอ', 'score': 3}
-    ], {
-        (0, 1): "คุณมีคุณค่าในแบบของคุณเสมอครับ ลองจด 'ความสำเร็จเล็กๆ' วันละ 3 ข้อดูนะครับ",
-        (2, 3): "ความภูมิใจในตัวเองคือเกราะป้องกันจิตใจที่ดีที่สุดครับ ยอดเยี่ยมมาก!"
-    }, severity=3)
-]
-
-questions = physical_questions + mental_questions
+"""
+Question bank. The questions live in question_bank.json (versioned, editable
+without a code change). The file is validated and compiled into Question tuples
+once; the compiled bank is pickled next to it, keyed by the file's SHA-256, so a
+worker start only hashes the file and unpickles.
+
+reload_bank() swaps in an edited file at runtime. Every bank loaded by this
+process stays available by version, so a session (and a stored row, via its
+Bank_Version column) is scored against the bank it was answered with. Each
+version served (passed through reload_bank) is also archived as
+question_bank.v<N>.json, which get_bank() loads for versions another worker
+(or an earlier run) served.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+BANK_PATH = os.environ.get("QUESTION_BANK") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                             "question_bank.json")
+CATEGORIES = ('Physical', 'Mental')
+RELOAD_INTERVAL = 5.0
+
+
+class Question(namedtuple('Question', [
+    'id', 'text', 'short_topic', 'category',  # category: 'Physical' or 'Mental'
+    'choice_texts',     # tuple: choice index -> label
+    'choice_scores',    # tuple: choice index -> score
+    'max_score',
+    'advice_by_score',  # tuple: score -> advice text ("" when there is none)
+    'severity',         # 1=Normal, 2=Important, 3=Critical
+])):
+    """
+    Immutable question; no per-instance __dict__, and scoring needs only tuple indexing.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def define(cls, id, text, short_topic, category, choices, advice_map, severity=1):
+        """
+        Build from the authoring form below: [{'text', 'score'}, ...] and {(scores...): advice}.
+        """
+        choice_texts = tuple(c['text'] for c in choices)
+        choice_scores = tuple(c['score'] for c in choices)
+        max_score = max(choice_scores)
+        advice = [""] * (max_score + 1)
+        for score_range, advice_text in advice_map.items():
+            for score in score_range:
+                if 0 <= score <= max_score and not advice[score]:
+                    advice[score] = advice_text
+        return cls(id, text, short_topic, category, choice_texts, choice_scores,
+                   max_score, tuple(advice), severity)
+
+
+
+class QuestionBankError(ValueError):
+    """
+    The bank file is invalid (message lists every problem found).
+    """
+
+
+QuestionBank = namedtuple('QuestionBank', ['version', 'digest', 'questions', 'by_id', 'category_max'])
+
+
+def _make_bank(version, digest, questions):
+    return QuestionBank(version, digest, questions,
+                        MappingProxyType({q.id: q for q in questions}),
+                        MappingProxyType({cat: sum(q.max_score for q in questions if q.category == cat)
+                                          for cat in CATEGORIES}))
+
+
+def compile_bank(spec, source="question bank"):
+    """
+    Validate a parsed bank file; returns (version, questions). Raises QuestionBankError.
+    """
+    problems = []
+    if not isinstance(spec, dict) or not isinstance(spec.get('questions'), list):
+        raise QuestionBankError(f"{source}: expected an object with a 'questions' list")
+    version = spec.get('version')
+    if not isinstance(version, int) or isinstance(version, bool) or version < 1:
+        problems.append("'version' must be a positive integer")
+
+    compiled, seen = [], set()
+    for n, q in enumerate(spec['questions'], 1):
+        where = f"question #{n}"
+        try:
+            qid = q['id']
+            if not isinstance(qid, int) or qid < 1 or qid in seen:
+                problems.append(f"{where}: id must be a unique positive integer")
+            seen.add(qid)
+            where = f"question {qid}"
+            if q['category'] not in CATEGORIES:
+                problems.append(f"{where}: category must be one of {CATEGORIES}")
+            if q.get('severity', 1) not in (1, 2, 3):
+                problems.append(f"{where}: severity must be 1, 2 or 3")
+            for key in ('text', 'short_topic'):
+                if not isinstance(q[key], str) or not q[key].strip():
+                    problems.append(f"{where}: {key} must be a non-empty string")
+            choices = q['choices']
+            if not choices or any(not isinstance(c['text'], str) or not isinstance(c['score'], int)
+                                  or c['score'] < 0 for c in choices):
+                problems.append(f"{where}: choices need a text and a non-negative integer score")
+                continue
+            max_score = max(c['score'] for c in choices)
+            advice_map = {}
+            for a in q['advice']:
+                if not isinstance(a['text'], str) or any(not isinstance(sc, int) or not 0 <= sc <= max_score
+                                                         for sc in a['scores']):
+                    problems.append(f"{where}: advice scores must be between 0 and {max_score}")
+                advice_map[tuple(a['scores'])] = a['text']
+            compiled.append(Question.define(qid, q['text'], q['short_topic'], q['category'],
+                                            choices, advice_map, severity=q.get('severity', 1)))
+        except (KeyError, TypeError) as e:
+            problems.append(f"{where}: missing or malformed field {e}")
+    if problems:
+        raise QuestionBankError(f"{source}: " + "; ".join(problems))
+    return version, tuple(compiled)
+
+
+def load_bank(path=BANK_PATH, use_cache=True):
+    """
+    Compiled bank for a file, via the pickle cache (<path>.cache) when it matches the content hash.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_path = path + ".cache"
+    if use_cache:
+        try:
+            with open(cache_path, "rb") as f:
+                cached_digest, version, questions = pickle.load(f)
+            if cached_digest == digest:
+                return _make_bank(version, digest, questions)
+        except Exception:
+            pass  # missing, stale format or corrupt: rebuild below
+
+    version, questions = compile_bank(json.loads(raw), source=path)
+    if use_cache:
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump((digest, version, questions), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass  # read-only deploy: compile on every start instead
+    return _make_bank(version, digest, questions)
+
+
+_banks = {}  # version -> QuestionBank, every bank loaded by this process
+_current = None
+_bank_lock = threading.Lock()
+_file_signature = None
+_checked = 0.0
+_last_error = None  # last reload problem reported (printed once)
+_archived = set()  # versions archive_bank() was tried for (once each)
+
+
+def _signature(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def register_bank(bank, make_current=False):
+    """
+    Make a bank available to get_bank(), e.g. an archived older version for re-scoring stored rows.
+    """
+    global _current
+    known = _banks.get(bank.version)
+    if known is not None and known.digest != bank.digest:
+        raise QuestionBankError(f"question bank version {bank.version} changed without a version bump")
+    _banks[bank.version] = bank
+    if make_current:
+        _current = bank
+
+
+def current_bank():
+    return _current
+
+
+def archive_path(version, path=None):
+    stem, ext = os.path.splitext(path or BANK_PATH)
+    return f"{stem}.v{version}{ext}"
+
+
+def archive_bank(bank, path=None):
+    """
+    Keep a copy of a served bank file as <stem>.v<N>.json, so other workers and later
+    restarts can still load that version after the file is edited.
+    """
+    path = path or BANK_PATH
+    target = archive_path(bank.version, path)
+    if os.path.exists(target):
+        return
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        if hashlib.sha256(raw).hexdigest() != bank.digest:
+            return  # edited again meanwhile; archived when that version is loaded
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(raw)
+        os.replace(tmp, target)
+    except OSError:
+        pass  # read-only deploy: older versions are only known to the process that loaded them
+
+
+def get_bank(version=None):
+    """
+    The bank for a version (None = current), from memory or its archived file;
+    None if this process cannot load it.
+    """
+    if version is None:
+        return _current
+    bank = _banks.get(version)
+    if bank is None and os.path.exists(archive_path(version)):
+        with _bank_lock:
+            try:
+                bank = load_bank(archive_path(version))
+                if bank.version != version:
+                    raise QuestionBankError(f"{archive_path(version)} holds version {bank.version}")
+                register_bank(bank)
+            except (OSError, ValueError) as e:
+                print(f"Cannot load archived question bank v{version}: {e}", file=sys.stderr)
+                return None
+    return bank
+
+
+def require_bank(version=None):
+    """
+    get_bank() for scoring stored rows: a version this process never loaded raises
+    instead of letting the answers be read against another bank.
+    """
+    bank = get_bank(version)
+    if bank is None:
+        raise QuestionBankError(f"rows use question bank v{version}; load it first (data.register_bank)")
+    return bank
+
+
+def reload_bank(path=BANK_PATH, force=False):
+    """
+    Switch to the bank file's current contents if it changed on disk (checked at most
+    every RELOAD_INTERVAL seconds). An invalid file is reported and the current bank kept.
+    Returns the current bank.
+    """
+    global _file_signature, _checked, _last_error
+    if _current.version not in _archived:
+        # Archived when first served rather than at import (read-only deploys, tests)
+        _archived.add(_current.version)
+        archive_bank(_current, path)
+    now = time.monotonic()
+    if not force and now - _checked < RELOAD_INTERVAL:
+        return _current
+    with _bank_lock:
+        _checked = now
+        try:
+            signature = _signature(path)
+            if signature != _file_signature or force:
+                # Recorded first, so a bad file is reported once rather than on every check
+                _file_signature = signature
+                register_bank(load_bank(path), make_current=True)
+                _archived.add(_current.version)
+                archive_bank(_current, path)
+            _last_error = None
+        except (OSError, ValueError) as e:
+            if str(e) != _last_error:
+                print(f"Keeping question bank v{_current.version}: {e}", file=sys.stderr)
+                _last_error = str(e)
+        return _current
+
+
+with _bank_lock:
+    _file_signature = _signature(BANK_PATH)
+    register_bank(load_bank(BANK_PATH), make_current=True)
+    _checked = time.monotonic()
+
+# The bank loaded at import; code that follows hot reloads uses current_bank()/get_bank()
+bank = _current
+BANK_VERSION = bank.version
+questions = bank.questions
+physical_questions = tuple(q for q in questions if q.category == 'Physical')
+mental_questions = tuple(q for q in questions if q.category == 'Mental')
+questions_by_id = bank.by_id
+category_max = bank.category_max
@@ -0,0 +1,194 @@
+"""
+Golden results table: a stratified sample of the answer space x BMI bands, with
+what calculate_results, generate_summary and create_bar_chart produce for each case.
+It is the oracle for every optimized scoring path (score_batch included) and a
+throughput benchmark.
+
+    python golden.py build                       # (re)write golden_results.jsonl
+    python golden.py check                       # recompute everything and compare
+    python golden.py bench --processes 1 2 4     # results/second per pool size
+
+The full space (4^15 * 3^5 answer sets) is far too large to enumerate, so each
+BMI case is combined with sampled answer profiles (uniform, low, high, partial)
+plus every constant answer set and the empty one.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+from data import questions
+from scoring import BMI_TOPIC
+
+GOLDEN_PATH = "golden_results.jsonl"
+UNANSWERED = "-"
+# Strengths/gaps are stored as question ids (0 = BMI) to keep the table small
+TOPIC_IDS = {BMI_TOPIC: 0, **{q.short_topic: q.id for q in questions}}
+
+# (weight, height) covering every BMI band, its edges and the missing/invalid inputs
+BMI_CASES = [
+    (None, None), (60.0, None), (0, 170.0), (-3.0, 170.0),
+    (45.0, 170.0),   # underweight
+    (60.0, 170.0),   # normal
+    (66.3, 170.0),   # 22.94: in the gap after the normal band (falls through to obese II)
+    (66.5, 170.0),   # 23.01: overweight
+    (80.0, 170.0),   # obese I
+    (95.0, 170.0),   # obese II
+]
+PROFILES = ('uniform', 'low', 'high', 'partial')
+
+
+def _choice(rng, q, profile):
+    if profile == 'partial' and rng.random() < 0.3:
+        return None
+    if profile == 'low':
+        return rng.choice([i for i, s in enumerate(q.choice_scores) if s <= 1])
+    if profile == 'high':
+        return rng.choice([i for i, s in enumerate(q.choice_scores) if s >= 2])
+    return rng.randrange(len(q.choice_scores))
+
+
+def encode_answers(answers):
+    return "".join(str(answers[q.id]) if q.id in answers else UNANSWERED for q in questions)
+
+
+def decode_answers(text):
+    return {q.id: int(c) for q, c in zip(questions, text) if c != UNANSWERED}
+
+
+def generate_cases(per_stratum=8, seed=0):
+    """
+    Deterministic (answers, weight, height) cases, stratified by BMI case and answer profile.
+    """
+    rng = random.Random(seed)
+    answer_sets = [{}]
+    answer_sets += [{q.id: min(k, len(q.choice_scores) - 1) for q in questions} for k in range(4)]
+    for profile in PROFILES:
+        for _ in range(per_stratum):
+            answers = {q.id: _choice(rng, q, profile) for q in questions}
+            answer_sets.append({k: v for k, v in answers.items() if v is not None})
+    return [(encode_answers(a), w, h) for w, h in BMI_CASES for a in answer_sets]
+
+
+def evaluate(case):
+    """
+    One table row: everything the results page shows for this case.
+    """
+    from charts import bar_chart_json
+    from scoring import calculate_results, generate_summary
+
+    answers_text, weight, height = case
+    results, strengths, gaps = calculate_results(decode_answers(answers_text), weight=weight, height=height)
+    chart = json.loads(bar_chart_json(results))['data'][0]
+    return {
+        'answers': answers_text, 'weight': weight, 'height': height,
+        'physical': [results['Physical']['score'], results['Physical']['max']],
+        'mental': [results['Mental']['score'], results['Mental']['max']],
+        'strengths': [TOPIC_IDS[s['topic']] for s in strengths],
+        'gaps': [TOPIC_IDS[g['topic']] for g in gaps],
+        'summary_sha256': hashlib.sha256(generate_summary(gaps).encode("utf-8")).hexdigest(),
+        'chart': {'x': chart['x'], 'text': chart['text']},
+    }
+
+
+def _evaluate_chunk(cases):
+    return [evaluate(c) for c in cases]
+
+
+def evaluate_all(cases, processes=None, chunksize=256):
+    """
+    evaluate() over every case, in a process pool (processes=1 runs inline).
+    """
+    chunks = [cases[i:i + chunksize] for i in range(0, len(cases), chunksize)]
+    if processes == 1:
+        rows = [_evaluate_chunk(c) for c in chunks]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            rows = pool.map(_evaluate_chunk, chunks)
+    return [row for chunk in rows for row in chunk]
+
+
+def load_table(path=GOLDEN_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_table(rows, path=GOLDEN_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, sort_keys=True) + "\n")
+
+
+def check_table(table, processes=None):
+    """
+    Recompute every golden row, scalar and vectorized; returns a list of mismatch descriptions.
+    """
+    import pandas as pd
+    from batch_scoring import score_batch
+
+    problems = []
+    cases = [(r['answers'], r['weight'], r['height']) for r in table]
+    for expected, got in zip(table, evaluate_all(cases, processes)):
+        for key in expected:
+            if expected[key] != got[key]:
+                problems.append(f"{expected['answers']} w={expected['weight']} h={expected['height']} "
+                                f"{key}: expected {expected[key]}, got {got[key]}")
+
+    frame = pd.DataFrame([{**{f"Q{qid}": v + 1 for qid, v in decode_answers(r['answers']).items()},
+                           'Weight': r['weight'], 'Height': r['height']} for r in table])
+    scored = score_batch(frame)
+    for i, r in enumerate(table):
+        for cat, key in (('Physical', 'physical'), ('Mental', 'mental')):
+            got = [int(scored[f'{cat}_Score'].iat[i]), int(scored[f'{cat}_Max'].iat[i])]
+            if got != r[key]:
+                problems.append(f"{r['answers']} score_batch {cat}: expected {r[key]}, got {got}")
+    return problems
+
+
+def bench(n_cases, process_counts):
+    rng = random.Random(1)
+    cases = [(encode_answers({q.id: rng.randrange(len(q.choice_scores)) for q in questions}),
+              *rng.choice(BMI_CASES)) for _ in range(n_cases)]
+    evaluate_all(cases[:64], processes=1)  # warm imports and the chart cache
+    for processes in process_counts:
+        start = time.perf_counter()
+        evaluate_all(cases, processes)
+        elapsed = time.perf_counter() - start
+        print(f"processes={processes:<3} {n_cases / elapsed:10.0f} results/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="write the golden table")
+    p.add_argument("--per-stratum", type=int, default=8)
+    p.add_argument("--path", default=GOLDEN_PATH)
+    p.add_argument("--processes", type=int)
+    p = sub.add_parser("check", help="compare the current code with the golden table")
+    p.add_argument("--path", default=GOLDEN_PATH)
+    p.add_argument("--processes", type=int)
+    p = sub.add_parser("bench", help="results/second for each pool size")
+    p.add_argument("--cases", type=int, default=20000)
+    p.add_argument("--processes", type=int, nargs="+", default=[1, multiprocessing.cpu_count()])
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        rows = evaluate_all(generate_cases(args.per_stratum), args.processes)
+        write_table(rows, args.path)
+        print(f"Wrote {len(rows)} cases to {args.path}")
+    elif args.command == "check":
+        problems = check_table(load_table(args.path), args.processes)
+        for line in problems[:50]:
+            print(line)
+        print("OK" if not problems else f"{len(problems)} mismatches")
+        return 1 if problems else 0
+    else:
+        bench(args.cases, args.processes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
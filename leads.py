@@ -0,0 +1,286 @@
+"""
+Board game leads (the email left on the 'leads' step), stored apart from the
+assessment rows so those stay anonymous. Emails are normalized and checked
+against an index of their SHA-256 hashes: a set in memory, persisted as an
+append-only file that every worker process reads and appends under a file lock.
+Each browser session can leave only a few leads per hour.
+
+    python leads.py export leads.db leads_export.csv [--since "2024-05-01 00:00:00"]
+    python leads.py import assessment_results.db     # copy emails out of older assessment rows
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+from locks import file_lock
+
+LEADS_PATH = "leads.db"
+INTERESTED = "สนใจ"
+# Per browser session (a retake clears session_state, not the session) and per worker process
+LEADS_PER_SESSION = 3
+LEAD_WINDOW = 3600
+
+# Submission_ID holds the email hash, so the store itself also ignores duplicates
+LEAD_COLUMNS = ['Submission_ID', 'Timestamp', 'Email']
+EXPORT_COLUMNS = ['Timestamp', 'Email']
+
+SAVED, DUPLICATE, INVALID, RATE_LIMITED = "saved", "duplicate", "invalid", "rate_limited"
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s.]+$")
+# Providers that ignore dots in the local part
+_DOTLESS_DOMAINS = {'gmail.com': 'gmail.com', 'googlemail.com': 'gmail.com'}
+
+
+def clean_email(email):
+    """
+    The address as typed, trimmed and lowercased; None if it does not look like an email.
+    """
+    email = (email or "").strip().lower()
+    return email if _EMAIL_RE.match(email) else None
+
+
+def normalize_email(email):
+    """
+    Canonical form for deduplication: no +tag, and no dots for Gmail addresses.
+    """
+    email = clean_email(email)
+    if email is None:
+        return None
+    local, domain = email.rsplit("@", 1)
+    local = local.split("+", 1)[0]
+    if domain in _DOTLESS_DOMAINS:
+        local, domain = local.replace(".", ""), _DOTLESS_DOMAINS[domain]
+    return f"{local}@{domain}" if local else None
+
+
+def email_hash(email):
+    return hashlib.sha256(normalize_email(email).encode("utf-8")).hexdigest()
+
+
+class EmailIndex:
+    """
+    Set of email hashes, persisted as one hex digest per line. Membership is a set
+    lookup; add() catches up with lines other processes appended before deciding.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._hashes = set()
+        self._offset = 0
+        self._lock = threading.Lock()
+        with self._lock:
+            self._read_new()
+
+    def _read_new(self):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # a torn last line is read once it is complete
+        self._hashes.update(data[:end].decode("ascii").split())
+        self._offset += end
+
+    def __contains__(self, digest):
+        return digest in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, digest, write=None):
+        """
+        Record a new digest, calling write() first (the entry is only added if it succeeds).
+        False if the digest was already present, in this or any other process.
+        """
+        if digest in self._hashes:
+            return False
+        with self._lock, file_lock(self.path):
+            self._read_new()
+            if digest in self._hashes:
+                return False
+            if write is not None:
+                write()
+            line = (digest + "\n").encode("ascii")
+            with open(self.path, "ab") as f:
+                f.write(line)
+            self._offset += len(line)
+            self._hashes.add(digest)
+            return True
+
+    def rebuild(self, digests):
+        """
+        Rewrite the index file from the lead store (when the file was lost).
+        """
+        with self._lock, file_lock(self.path):
+            digests = sorted(set(digests))
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="ascii") as f:
+                f.writelines(d + "\n" for d in digests)
+            os.replace(tmp, self.path)
+            self._hashes = set(digests)
+            self._offset = os.path.getsize(self.path)
+
+
+class RateLimiter:
+    """
+    Sliding window: at most `limit` calls per `window` seconds for each key.
+    Only the `max_keys` most recently seen keys are tracked.
+    The counts are per process: with several workers (config.py shared_state) a
+    session that is moved between workers gets up to `limit` on each of them.
+    """
+
+    def __init__(self, limit, window, max_keys=10000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._events = OrderedDict()  # key -> deque of call times
+        self._lock = threading.Lock()
+
+    def allow(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = deque()
+            else:
+                self._events.move_to_end(key)
+            while events and events[0] <= now - self.window:
+                events.popleft()
+            if len(events) >= self.limit:
+                return False
+            events.append(now)
+            while len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+            return True
+
+
+def _lead_store(path):
+    from storage import CsvBackend, SQLiteBackend
+
+    if path.endswith(".csv"):
+        return CsvBackend(path, LEAD_COLUMNS)
+    return SQLiteBackend(path, table="leads", columns=LEAD_COLUMNS)
+
+
+class LeadSink:
+    def __init__(self, path, limiter=None):
+        self.path = path
+        self.store = _lead_store(path)
+        self.index = EmailIndex(path + ".index")
+        if not os.path.exists(self.index.path):
+            self.index.rebuild(row['Submission_ID'] for row in self.store.scan())
+        self.limiter = limiter or RateLimiter(LEADS_PER_SESSION, LEAD_WINDOW)
+
+    def add(self, email, session_key=None):
+        """
+        Store one lead; returns SAVED, DUPLICATE, INVALID or RATE_LIMITED.
+        Every attempt counts towards the session's limit, so it cannot be used to probe addresses.
+        """
+        if session_key is not None and not self.limiter.allow(session_key):
+            return RATE_LIMITED
+        address = clean_email(email)
+        if address is None or normalize_email(address) is None:
+            return INVALID
+        digest = email_hash(address)
+        row = {
+            'Submission_ID': digest,
+            'Timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'Email': address,
+        }
+        return SAVED if self.index.add(digest, lambda: self.store.append(row)) else DUPLICATE
+
+    def export(self, dest, since=None, batch_size=500):
+        """
+        Write leads (Timestamp, Email) to a CSV file in batches; returns the number written.
+        since: only leads with a Timestamp at or after this "YYYY-MM-DD HH:MM:SS" string.
+        """
+        count = 0
+        with open(dest, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            batch = []
+            for row in self.store.scan():
+                if since and str(row.get('Timestamp') or "") < since:
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    writer.writerows(batch)
+                    count += len(batch)
+                    batch = []
+            writer.writerows(batch)
+            count += len(batch)
+        return count
+
+
+_sinks = {}
+_sinks_lock = threading.Lock()
+
+
+def get_lead_sink(path=LEADS_PATH):
+    with _sinks_lock:
+        sink = _sinks.get(path)
+        if sink is None:
+            sink = _sinks[path] = LeadSink(path)
+        return sink
+
+
+def capture_lead(email, session_key, config=None):
+    """
+    Store the email of an interested participant in the configured lead sink
+    (config.py leads_path). None when leads are switched off.
+    """
+    from config import DEFAULTS, get_storage_config
+    config = get_storage_config() if config is None else {**DEFAULTS, **config}
+    if not config['leads_path']:
+        return None
+    return get_lead_sink(config['leads_path']).add(email, session_key)
+
+
+def import_leads(sink, rows):
+    """
+    Copy the emails of interested participants from older assessment rows; returns (saved, duplicates).
+    """
+    saved = duplicates = 0
+    for row in rows:
+        if str(row.get('Interest') or "") != INTERESTED or not str(row.get('Email') or "").strip():
+            continue
+        status = sink.add(row['Email'])
+        saved += status == SAVED
+        duplicates += status == DUPLICATE
+    return saved, duplicates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="write the leads to a CSV file")
+    p.add_argument("leads")
+    p.add_argument("dest")
+    p.add_argument("--since")
+    p = sub.add_parser("import", help="copy emails from an assessment results file (.db/.csv)")
+    p.add_argument("source")
+    p.add_argument("--leads", default=LEADS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        count = get_lead_sink(args.leads).export(args.dest, since=args.since)
+        print(f"Exported {count} leads to {args.dest}")
+    else:
+        from storage import CsvBackend, SQLiteBackend
+        source = CsvBackend(args.source, []) if args.source.endswith(".csv") else SQLiteBackend(args.source)
+        saved, duplicates = import_leads(get_lead_sink(args.leads), source.scan())
+        print(f"Imported {saved} leads ({duplicates} duplicates skipped) into {args.leads}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
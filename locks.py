@@ -0,0 +1,26 @@
+"""
+Cross-process file locks for state files shared by every worker process
+(live aggregates, the lead index, spool replays).
+"""
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, one worker only
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive flock on <path>.lock for the duration of the block.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,218 @@
+"""
+Lightweight timing instrumentation for the hot paths.
+
+Disabled by default: a decorated call then costs one flag check. Turn it on with
+configure(enabled=True) or the environment (see configure_from_env):
+
+    METRICS_ENABLED=1        record durations
+    METRICS_PORT=9100        serve Prometheus text at http://<host>:9100/metrics
+    METRICS_JSON=path.json   dump all histograms to a JSON file every METRICS_JSON_INTERVAL s (default 30)
+    METRICS_PROFILE_RATE=0.01  run that fraction of timed calls under cProfile (see dump_profile)
+"""
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds (Prometheus-style cumulative buckets, +Inf implied)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = False
+_profile_rate = 0.0
+_histograms = {}
+_lock = threading.Lock()
+_profile_stats = None
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += seconds
+        self.count += 1
+
+    def to_dict(self):
+        return {'buckets': dict(zip([str(b) for b in BUCKETS] + ['+Inf'], self.counts)),
+                'sum': self.total, 'count': self.count}
+
+
+def observe(name, seconds):
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(seconds)
+
+
+@contextmanager
+def timer(name):
+    """
+    Time a block (e.g. one app step). Records even when the block raises (st.rerun does).
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def start_timer(name):
+    """
+    timer() for a script body that is not wrapped in a block (app.py's page content):
+    returns stop(suffix=""), which records the time since this call as name + suffix.
+    Code that ends the run early calls it first (app.py's rerun() records
+    "step.<name>.rerun"), so those runs are kept apart from plain renders.
+    """
+    if not _enabled:
+        return lambda suffix="": None
+    start = time.perf_counter()
+    return lambda suffix="": observe(name + suffix, time.perf_counter() - start)
+
+
+def timed(name):
+    """
+    Decorator version of timer(); sampled calls also run under cProfile.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                if _profile_rate and random.random() < _profile_rate:
+                    return _profiled(fn, *args, **kwargs)
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _profiled(fn, *args, **kwargs):
+    global _profile_stats
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        with _lock:
+            if _profile_stats is None:
+                _profile_stats = pstats.Stats(profiler)
+            else:
+                _profile_stats.add(profiler)
+
+
+def dump_profile(path):
+    """
+    Write the accumulated cProfile samples (pstats format); returns False when there are none.
+    """
+    with _lock:
+        if _profile_stats is None:
+            return False
+        _profile_stats.dump_stats(path)
+    return True
+
+
+def snapshot():
+    with _lock:
+        return {name: hist.to_dict() for name, hist in sorted(_histograms.items())}
+
+
+def reset():
+    global _profile_stats
+    with _lock:
+        _histograms.clear()
+        _profile_stats = None
+
+
+def render_prometheus(prefix="health_app"):
+    lines = [f"# TYPE {prefix}_duration_seconds histogram"]
+    for name, hist in snapshot().items():
+        cumulative = 0
+        for bound, count in hist['buckets'].items():
+            cumulative += count
+            lines.append(f'{prefix}_duration_seconds_bucket{{op="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{prefix}_duration_seconds_sum{{op="{name}"}} {hist["sum"]}')
+        lines.append(f'{prefix}_duration_seconds_count{{op="{name}"}} {hist["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def dump_json(path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({'time': time.time(), 'histograms': snapshot()}, f)
+    os.replace(tmp, path)
+
+
+def start_json_dumper(path, interval=30.0):
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                dump_json(path)
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=run, name="metrics-json", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_http_server(port, host="0.0.0.0"):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def configure(enabled=True, profile_rate=0.0):
+    global _enabled, _profile_rate
+    _enabled = enabled
+    _profile_rate = profile_rate
+
+
+def configure_from_env(environ=os.environ):
+    """
+    Apply the METRICS_* settings; call once per process.
+    """
+    port = environ.get("METRICS_PORT")
+    json_path = environ.get("METRICS_JSON")
+    enabled = environ.get("METRICS_ENABLED") == "1" or bool(port) or bool(json_path)
+    configure(enabled=enabled, profile_rate=float(environ.get("METRICS_PROFILE_RATE", 0) or 0))
+    if port:
+        start_http_server(int(port))
+    if json_path:
+        start_json_dumper(json_path, float(environ.get("METRICS_JSON_INTERVAL", 30)))
+    return enabled
@@ -0,0 +1,272 @@
+from data import current_bank
+from scoring import get_health_label
+from metrics import timed
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+import datetime
+import threading
+import uuid
+import warnings
+
+
+def build_submission_row(weight, height, age, results, answers, interest="", submission_id=None, bank_version=None):
+    """
+    Flatten one assessment into a sheet row (column name -> value).
+    Rows are anonymous: emails go to the lead sink (leads.py).
+    bank_version: question bank the answers refer to (default: the current one).
+    """
+    # Calculate qualitative labels
+    phys_label = get_health_label(results['Physical']['score'], results['Physical']['max'])
+    ment_label = get_health_label(results['Mental']['score'], results['Mental']['max'])
+
+    row = {
+        'Submission_ID': submission_id or uuid.uuid4().hex,
+        'Timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'Interest': interest,
+        'Weight': weight,
+        'Height': height,
+        'Age': age,
+        'Physical_Score': f"{results['Physical']['score']}/{results['Physical']['max']}",
+        'Physical_Level': phys_label,
+        'Mental_Score': f"{results['Mental']['score']}/{results['Mental']['max']}",
+        'Mental_Level': ment_label,
+        'Bank_Version': bank_version or current_bank().version,
+    }
+    # Format answers as 1-based selection (1, 2, 3, ...)
+    row.update({f"Q{k}": v + 1 for k, v in answers.items()})
+    return row
+
+
+class StorageUnavailable(Exception):
+    """
+    Configuration problem; the message is shown to the user as-is.
+    """
+
+
+# Leading columns of a stored row; the Q<id> columns of the row's question bank follow
+ROW_COLUMNS = ['Submission_ID', 'Timestamp', 'Interest', 'Weight', 'Height', 'Age',
+               'Physical_Score', 'Physical_Level', 'Mental_Score', 'Mental_Level', 'Bank_Version']
+
+
+def submission_columns(bank=None):
+    """
+    Column order for file backends (default: the current bank). Columns of later banks
+    are added by the backends when a row first has them.
+    """
+    return ROW_COLUMNS + [f"Q{q.id}" for q in (bank or current_bank()).questions]
+
+# Shown when the primary backend fails and the row is spooled instead
+_BACKEND_FAILED = {
+    'sheets': "เชื่อมต่อ Sheets ไม่ได้",
+    'sqlite': "บันทึกลงฐานข้อมูล SQLite ไม่ได้",
+    'csv': "บันทึกลงไฟล์ CSV ไม่ได้",
+}
+
+_local_backends = {}
+_local_backends_lock = threading.Lock()
+
+
+def sheets_backend(sheet_url, max_in_flight=4):
+    """
+    Append writer for a sheet, on the shared client pool (sheets_pool.py).
+    Cached per sheet, so secrets are checked and the client authenticated once per process.
+    """
+    from storage import SheetsAppendWriter, get_registered_writer, set_sheet_writer
+
+    writer = get_registered_writer(sheet_url)
+    if writer is not None:
+        return writer
+
+    import streamlit as st
+
+    # Diagnostics: Check if service account info is actually present in secrets
+    if "connections" not in st.secrets or "gsheets" not in st.secrets["connections"]:
+        raise StorageUnavailable("ไม่พบการตั้งค่า [connections.gsheets] ใน Secrets (กรุณาดูคู่มือ GOOGLE_SHEETS_SETUP.md)")
+
+    info = dict(st.secrets["connections"]["gsheets"])
+    if info.get("type") != "service_account":
+        raise StorageUnavailable("ยังไม่ได้ตั้งค่า Service Account หรือยังไม่ได้ Share Sheet ให้ Email ของ Service Account ครับ")
+    worksheet = info.pop("worksheet", None)
+    info.pop("spreadsheet", None)
+
+    from sheets_pool import get_sheets_pool
+    pool = get_sheets_pool(info, max_in_flight=max_in_flight)
+    writer = SheetsAppendWriter(pool.worksheet(sheet_url, worksheet))
+    set_sheet_writer(sheet_url, writer)
+    return writer
+
+
+def local_backend(kind, path):
+    from storage import CsvBackend, SQLiteBackend
+
+    with _local_backends_lock:
+        backend = _local_backends.get((kind, path))
+        if backend is None:
+            if kind == 'sqlite':
+                backend = SQLiteBackend(path, columns=submission_columns())
+            else:
+                backend = CsvBackend(path, submission_columns())
+            _local_backends[(kind, path)] = backend
+        return backend
+
+
+def primary_backend(config):
+    if config['backend'] == 'sheets':
+        return sheets_backend(config['sheet_url'], int(config['sheets_max_in_flight']))
+    return local_backend(config['backend'], config['path'])
+
+
+def _write(backend, row, config):
+    from spool import replay_in_background
+    from submit_queue import get_submission_queue
+
+    # Deliver anything spooled for this backend during an earlier outage
+    replay_in_background(backend)
+
+    # Remote backends go through the background flusher (direct append when it is full);
+    # local ones are fast enough to write synchronously
+    if backend.remote:
+        if config['shared_state']:
+            # Multi-process mode: the outbox table is shared by every worker (shared_state.py)
+            from shared_state import get_shared_outbox
+            outbox = get_shared_outbox(config['shared_state'], _outbox_sink_resolver(config),
+                                       on_failure=_spool_failed_outbox_rows)
+            outbox.put(config['sheet_url'], row)
+            return
+        if get_submission_queue(on_failure=_spool_failed_rows).put(backend, row):
+            return
+    backend.append(row)
+
+
+def _outbox_sink_resolver(config):
+    max_in_flight = int(config['sheets_max_in_flight'])
+    return lambda sheet_url: sheets_backend(sheet_url, max_in_flight)
+
+
+def _spool_failed_outbox_rows(sheet_url, rows, error=None):
+    from spool import get_spool
+    get_spool('sheets').append_many(rows)
+
+
+def _record_aggregates(config, row):
+    """
+    Fold the accepted row into the live totals (aggregates.py); never fails the save.
+    """
+    if not config['aggregates_path']:
+        return
+    try:
+        from aggregates import get_live_aggregates
+        get_live_aggregates(config['aggregates_path']).add_row(row)
+    except Exception:
+        pass
+
+
+def _spool_failed_rows(backend, rows, error=None):
+    from spool import get_spool
+    get_spool(backend.name).append_many(rows)
+
+
+@timed("save_submission")
+def save_submission(weight, height, age, results, answers, consent=False, interest="", config=None,
+                    submission_id=None, bank_version=None):
+    """
+    Store one assessment in the configured backend (see config.py), plus the optional Sheets mirror.
+    """
+    if not consent:
+        return False, "ไม่ได้บันทึกข้อมูล (เนื่องจากไม่ได้รับความยินยอม)"
+
+    from config import DEFAULTS, get_storage_config
+    config = get_storage_config() if config is None else {**DEFAULTS, **config}
+    row = build_submission_row(weight, height, age, results, answers, interest=interest,
+                               submission_id=submission_id, bank_version=bank_version)
+
+    try:
+        primary = primary_backend(config)
+        _write(primary, row, config)
+    except StorageUnavailable as e:
+        return False, str(e)
+    except Exception as e:
+        # Fallback to the local spool (replayed into the backend once it is reachable again)
+        try:
+            from spool import get_spool
+            get_spool(config['backend']).append(row)
+            _record_aggregates(config, row)
+            return False, f"{_BACKEND_FAILED[config['backend']]} (บันทึกในเครื่องแทน): {str(e)}"
+        except:
+            return False, "ไม่สามารถบันทึกข้อมูลได้"
+
+    if config['mirror'] == 'sheets' and config['backend'] != 'sheets':
+        try:
+            _write(sheets_backend(config['sheet_url'], int(config['sheets_max_in_flight'])), row, config)
+        except Exception:
+            # Replayed into the sheet the next time it is reachable
+            from spool import get_spool
+            get_spool('sheets').append(row)
+
+    _record_aggregates(config, row)
+    if primary.remote:
+        return True, "บันทึกข้อมูลลง Google Sheet สำเร็จ!"
+    return True, "บันทึกข้อมูลสำเร็จ!"
+
+
+@timed("save_to_google_sheet")
+def save_to_google_sheet(weight, height, age, results, answers, sheet_url, consent=False, interest="", email=None):
+    """
+    Append a row to one specific sheet (Sheets backend, no mirror).
+    Only the new row is sent; existing responses are never downloaded or rewritten.
+    email: deprecated and ignored; rows are anonymous (store leads with leads.capture_lead).
+    """
+    if email is not None:
+        warnings.warn("save_to_google_sheet(email=...) is ignored; store leads with leads.capture_lead",
+                      DeprecationWarning, stacklevel=3)
+    config = {'backend': 'sheets', 'mirror': '', 'sheet_url': sheet_url}
+    return save_submission(weight, height, age, results, answers, consent=consent,
+                           interest=interest, config=config)
+
+
+# --- Non-blocking finalize ---
+MAX_TRACKED_SUBMISSIONS = 10000
+_finalize_executor = None
+_submissions = OrderedDict()  # idempotency key -> Future[(success, message)]
+_submissions_lock = threading.Lock()
+
+
+def _save_in_background(*args, **kwargs):
+    try:
+        return save_submission(*args, **kwargs)
+    except Exception:
+        return False, "ไม่สามารถบันทึกข้อมูลได้"
+
+
+def submit_submission(key, weight, height, age, results, answers, consent=False, interest="", bank_version=None):
+    """
+    Start save_submission in the background, once per key (reruns get the same Future).
+    The key doubles as the Submission_ID. Only the SQLite backend skips a row whose ID it already
+    holds (and spool replays skip delivered IDs); a resubmission after a restart is appended
+    again to Sheets and CSV.
+    """
+    global _finalize_executor
+    with _submissions_lock:
+        future = _submissions.get(key)
+        if future is not None:
+            return future
+        if _finalize_executor is None:
+            _finalize_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="finalize")
+        future = _submissions[key] = _finalize_executor.submit(
+            _save_in_background, weight, height, age, results, answers, consent=consent,
+            interest=interest, submission_id=key, bank_version=bank_version)
+        while len(_submissions) > MAX_TRACKED_SUBMISSIONS:
+            oldest_key, oldest = next(iter(_submissions.items()))
+            if not oldest.done():
+                break
+            del _submissions[oldest_key]
+        return future
+
+
+def wait_for_submissions(timeout=None):
+    """
+    Block until every submitted save has finished; True if none is still running.
+    """
+    with _submissions_lock:
+        futures = list(_submissions.values())
+    return not wait(futures, timeout).not_done
@@ -0,0 +1,125 @@
+"""
+HTML that only depends on the question bank, built once per bank version.
+Streamlit still needs every element re-emitted on each rerun, but the strings
+are looked up instead of rebuilt.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+
+CSS = """
+    <style>
+    @import url('https://fonts.googleapis.com/css2?family=Prompt:wght@300;400;500;600&display=swap');
+    
+    .stApp { background: linear-gradient(135deg, #e0f2f1 0%, #fff9c4 100%); font-family: 'Prompt', sans-serif; }
+    h1, h2, h3, h4, h5, h6 { color: #000000 !important; font-weight: 600; font-family: 'Prompt', sans-serif; }
+    p, span, div, li, label, .stMarkdown { color: #000000 !important; font-family: 'Prompt', sans-serif; }
+    
+    .block-container {
+        padding-top: 1.5rem !important;
+        padding-bottom: 5rem !important;
+        max-width: 100% !important;
+    }
+    
+    @media (max-width: 600px) {
+        h1 { font-size: 1.5rem !important; line-height: 1.3 !important; }
+        h2 { font-size: 1.3rem !important; }
+        h3 { font-size: 1.1rem !important; }
+        p, .stMarkdown p { font-size: 0.95rem !important; }
+        .content-card { padding: 1.5rem !important; }
+    }
+    
+    @media (min-width: 900px) {
+        .block-container {
+            max-width: 900px !important;
+            padding-top: 4rem !important;
+            margin: 0 auto;
+        }
+        h1 { font-size: 2.2rem !important; }
+    }
+    
+    .content-card { 
+        background: white; 
+        padding: 2.5rem; 
+        border-radius: 24px; 
+        box-shadow: 0 8px 30px rgba(0,0,0,0.08); 
+        margin-bottom: 2rem; 
+        text-align: center;
+    }
+
+    .summary-box {
+        background-color: #FFF3E0; 
+        border: 2px solid #FF9800;
+        border-radius: 15px; 
+        padding: 25px; 
+        margin-top: 10px;
+        color: #000000 !important;
+        font-size: 1.1rem;
+        line-height: 1.7;
+        text-align: left;
+    }
+
+    .stButton > button {
+        width: 100%;
+        border-radius: 16px !important;
+        padding: 1rem 1rem !important;
+        font-family: 'Prompt', sans-serif !important;
+        font-size: 1.3rem !important;
+        font-weight: 500 !important;
+        transition: all 0.2s ease;
+    }
+
+    .stButton > button[kind="primary"] {
+        background: linear-gradient(135deg, #2ECC71 0%, #27AE60 100%) !important;
+        color: white !important; 
+        border: None !important;
+        box-shadow: 0 10px 20px rgba(46, 204, 113, 0.3);
+    }
+    
+    .stButton > button:not([kind="primary"]) {
+        background-color: white !important;
+        color: #2E7D32 !important;
+        border: 2px solid #E0E0E0 !important; 
+    }
+    
+    div[data-testid="stRadio"] label p { color: #000000 !important; font-size: 1.15rem; }
+    div[data-testid="stRadio"] { background-color: rgba(255,255,255,0.5); padding: 10px; border-radius: 10px; }
+    
+    </style>
+"""
+
+QuestionView = namedtuple('QuestionView', [
+    'header_html', 'counter_html', 'card_html', 'progress',
+    'options',        # tuple of choice texts, in radio order
+    'index_by_text',  # choice text -> choice index
+])
+
+
+def build_question_view(q_idx, q, total):
+    icon = "💪" if q.category == 'Physical' else "🧠"
+    options = q.choice_texts
+    index_by_text = {}
+    for i, text in enumerate(options):
+        index_by_text.setdefault(text, i)  # first match wins, like the old scan
+    return QuestionView(
+        header_html=f"<p style='text-align:center; font-size: 1.2rem; margin-bottom: 0;'>{icon} {q.category} Assessment</p>",
+        counter_html=f"<p style='text-align:center; color:#666;'>ข้อที่ {q_idx + 1} จาก {total}</p>",
+        card_html=f"<div class='content-card'><h3>{q.text}</h3></div>",
+        progress=(q_idx + 1) / total,
+        options=options,
+        index_by_text=MappingProxyType(index_by_text),
+    )
+
+
+_views_by_digest = {}
+
+
+def question_views(bank):
+    """
+    Views for every question of a bank, built once per bank content.
+    """
+    views = _views_by_digest.get(bank.digest)
+    if views is None:
+        views = _views_by_digest[bank.digest] = tuple(
+            build_question_view(i, q, len(bank.questions)) for i, q in enumerate(bank.questions))
+    return views
@@ -0,0 +1,186 @@
+"""
+Cohort report over the stored responses, streamed in chunks (constant memory).
+
+    python report.py assessment_results.csv            # exported sheet or CSV backend
+    python report.py assessment_results.db             # SQLite backend
+    python report.py assessment_spool.log --json       # spool file
+
+Reports average Physical/Mental percentage by age band, level distribution,
+gap frequency per topic and interest (board game) conversion.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import bank_arrays, question_scores, score_batch, split_by_bank_version
+from data import current_bank
+from scoring import BMI_TOPIC, get_health_label
+
+AGE_EDGES = [18, 25, 35, 45, 55, 65]
+AGE_BANDS = ["<18", "18-24", "25-34", "35-44", "45-54", "55-64", "65+", "unknown"]
+INTERESTED = "สนใจ"
+LEVELS = [get_health_label(s, 100) for s in (100, 60, 40, 0)] + [get_health_label(0, 0)]
+
+
+class ReportAggregator:
+    """
+    Running totals; add() each chunk, then summary().
+    """
+
+    def __init__(self):
+        n_bands = len(AGE_BANDS)
+        self.rows = 0
+        self.band_count = {cat: np.zeros(n_bands, dtype=np.int64) for cat in ('Physical', 'Mental')}
+        self.band_pct_sum = {cat: np.zeros(n_bands) for cat in ('Physical', 'Mental')}
+        self.levels = {cat: dict.fromkeys(LEVELS, 0) for cat in ('Physical', 'Mental')}
+        # Per question id over every bank version in the rows (topic from the current bank when it has the question)
+        self.questions = {q.id: q for q in current_bank().questions}
+        self.gap_counts = dict.fromkeys(self.questions, 0)
+        self.answered_counts = dict.fromkeys(self.questions, 0)
+        self.bmi_gaps = 0
+        self.bmi_given = 0
+        self.interested = 0
+        self.interested_with_email = 0
+
+    def add(self, df):
+        if df.empty:
+            return
+        self.rows += len(df)
+        scored = score_batch(df)
+
+        age = pd.to_numeric(df['Age'], errors='coerce').to_numpy(dtype=float) if 'Age' in df else np.full(len(df), np.nan)
+        band = np.where(np.isnan(age), len(AGE_BANDS) - 1, np.digitize(np.nan_to_num(age), AGE_EDGES))
+        for cat in ('Physical', 'Mental'):
+            score = scored[f'{cat}_Score'].to_numpy(dtype=float)
+            max_score = scored[f'{cat}_Max'].to_numpy(dtype=float)
+            has_max = max_score > 0
+            pct = np.divide(score, max_score, out=np.zeros_like(score), where=has_max) * 100
+            self.band_count[cat] += np.bincount(band[has_max], minlength=len(AGE_BANDS))
+            self.band_pct_sum[cat] += np.bincount(band[has_max], weights=pct[has_max], minlength=len(AGE_BANDS))
+            for label, count in scored[f'{cat}_Level'].value_counts().items():
+                self.levels[cat][label] = self.levels[cat].get(label, 0) + int(count)
+
+        has_bmi = scored['BMI_Category'].to_numpy() >= 0
+        self.bmi_given += int(has_bmi.sum())
+        physical_question_gaps = 0
+        for bank, rows in split_by_bank_version(df) or [(current_bank(), df)]:
+            arrays = bank_arrays(bank)
+            scores, answered = question_scores(rows, bank)
+            gaps = answered & (scores <= 1)
+            for qid, g, a in zip(arrays.question_ids, gaps.sum(axis=0), answered.sum(axis=0)):
+                self.gap_counts[qid] = self.gap_counts.get(qid, 0) + int(g)
+                self.answered_counts[qid] = self.answered_counts.get(qid, 0) + int(a)
+                self.questions.setdefault(qid, bank.by_id[qid])
+            physical_question_gaps += int(gaps[:, arrays.is_physical].sum())
+        # BMI is a gap when its score is <= 1: total physical gaps minus question gaps
+        self.bmi_gaps += int(scored['Physical_Gaps'].sum()) - physical_question_gaps
+
+        if 'Interest' in df:
+            interested = (df['Interest'].astype(str) == INTERESTED).to_numpy()
+            self.interested += int(interested.sum())
+            if 'Email' in df:
+                email = df['Email'].fillna("").astype(str).str.strip().to_numpy() != ""
+                self.interested_with_email += int((interested & email).sum())
+
+    def summary(self):
+        by_band = []
+        for i, band in enumerate(AGE_BANDS):
+            entry = {'age_band': band}
+            for cat in ('Physical', 'Mental'):
+                n = int(self.band_count[cat][i])
+                entry[f'{cat.lower()}_n'] = n
+                entry[f'{cat.lower()}_avg_pct'] = round(self.band_pct_sum[cat][i] / n, 1) if n else None
+            by_band.append(entry)
+
+        gaps = [{'topic': self.questions[qid].short_topic, 'category': self.questions[qid].category,
+                 'gaps': self.gap_counts[qid], 'answered': self.answered_counts[qid]}
+                for qid in self.questions]
+        gaps.append({'topic': BMI_TOPIC, 'category': 'Physical', 'gaps': self.bmi_gaps, 'answered': self.bmi_given})
+        gaps.sort(key=lambda g: g['gaps'], reverse=True)
+
+        return {
+            'responses': self.rows,
+            'by_age_band': [b for b in by_band if b['physical_n'] or b['mental_n']],
+            'levels': self.levels,
+            'gaps_by_topic': gaps,
+            'interest': {
+                'interested': self.interested,
+                'with_email': self.interested_with_email,
+                'conversion_pct': round(self.interested / self.rows * 100, 1) if self.rows else None,
+            },
+        }
+
+
+def iter_chunks(path, chunksize=10000):
+    """
+    Yield DataFrames of at most `chunksize` responses from a CSV, SQLite database, spool file
+    or archive (archive.py).
+    """
+    if path.endswith(".db") or path.endswith(".sqlite"):
+        import sqlite3
+        with sqlite3.connect(path) as conn:
+            yield from pd.read_sql_query('SELECT * FROM "responses"', conn, chunksize=chunksize)
+    elif path.endswith(".log"):
+        from spool import Spool
+        batch = []
+        for _, row in Spool(path).read():
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch)
+    elif path.endswith(".npy") or path.endswith(".parquet"):
+        from archive import load_archive, unpack
+        records = load_archive(path)
+        for start in range(0, len(records), chunksize):
+            yield unpack(records[start:start + chunksize])
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, dtype={'Email': str, 'Interest': str})
+
+
+def build_report(path, chunksize=10000):
+    agg = ReportAggregator()
+    for chunk in iter_chunks(path, chunksize):
+        agg.add(chunk)
+    return agg.summary()
+
+
+def format_report(report):
+    lines = [f"Responses: {report['responses']}", "", "Average score % by age band:",
+             f"  {'age':<8}{'n':>8}{'Physical':>10}{'Mental':>10}"]
+    for b in report['by_age_band']:
+        fmt = lambda v: f"{v:>10.1f}" if v is not None else f"{'-':>10}"
+        lines.append(f"  {b['age_band']:<8}{max(b['physical_n'], b['mental_n']):>8}"
+                     f"{fmt(b['physical_avg_pct'])}{fmt(b['mental_avg_pct'])}")
+    for cat, levels in report['levels'].items():
+        lines += ["", f"{cat} levels:"] + [f"  {label}: {n}" for label, n in levels.items() if n]
+    lines += ["", "Gaps by topic (score <= 1):"]
+    for g in report['gaps_by_topic']:
+        pct = g['gaps'] / g['answered'] * 100 if g['answered'] else 0
+        lines.append(f"  {g['topic']} ({g['category']}): {g['gaps']}/{g['answered']} ({pct:.1f}%)")
+    i = report['interest']
+    lines += ["", f"Interested: {i['interested']} ({i['conversion_pct']}%), with email: {i['with_email']}"]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--chunksize", type=int, default=10000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.path, args.chunksize)
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import data
+from metrics import timed
+from collections import namedtuple
+from functools import lru_cache
+import hashlib
+
+BMI_TOPIC = "ดัชนีมวลกาย (BMI)"
+
+def get_health_label(score, max_score):
+    """
+    Categorize health based on percentage.
+    """
+    if max_score <= 0: return "N/A"
+    pct = (score / max_score) * 100
+    if pct >= 80: return "ดีเยี่ยม (Excellent)"
+    elif pct >= 60: return "ดี (Good)"
+    elif pct >= 40: return "ปานกลาง (Fair)"
+    else: return "ควรปรับปรุง (Needs Improvement)"
+
+def calculate_bmi(weight, height):
+    """
+    Calculate BMI and return score, category label, and severity.
+    Weight in kg, Height in cm.
+    """
+    if not weight or not height or height <= 0:
+        return 0, "ข้อมูลไม่สมบูรณ์", 1, 0
+
+    height_m = height / 100
+    bmi = weight / (height_m ** 2)
+    
+    # Calculate Ideal Weight Range (BMI 18.5 - 22.9)
+    ideal_min = 18.5 * (height_m ** 2)
+    ideal_max = 22.9 * (height_m ** 2)
+    ideal_text = f" (น้ำหนักที่เหมาะสมสำหรับความสูงของคุณคือ {ideal_min:.1f} - {ideal_max:.1f} กก.)"
+
+    if bmi < 18.5:
+        return 1, f"BMI {bmi:.1f}: น้ำหนักต่ำกว่าเกณฑ์ (Underweight){ideal_text}", 2, 3 
+    elif 18.5 <= bmi <= 22.9:
+        return 3, f"BMI {bmi:.1f}: น้ำหนักปกติ (Normal)", 1, 3 
+    elif 23.0 <= bmi <= 24.9:
+        return 2, f"BMI {bmi:.1f}: น้ำหนักเกิน (Overweight){ideal_text}", 2, 3 
+    elif 25.0 <= bmi <= 29.9:
+        return 1, f"BMI {bmi:.1f}: อ้วนระดับ 1 (Obese I){ideal_text}", 3, 3 
+    else:
+        return 0, f"BMI {bmi:.1f}: อ้วนระดับ 2 (Obese II){ideal_text}", 3, 3
+
+
+@timed("calculate_results")
+def calculate_results(answers, weight=None, height=None, bank=None):
+    """
+    answers: dict of question_id -> selected_choice_index
+    bank: the data.QuestionBank the answers were given against (default: the current one)
+    Returns: results dict, strengths list, gaps list
+    """
+    results = {
+        'Physical': {'score': 0, 'max': 0},
+        'Mental': {'score': 0, 'max': 0}
+    }
+    
+    strengths = []
+    gaps = []
+    
+    # 1. Standard Questions (tuple lookups: choice -> score -> advice)
+    for q in (bank or data.current_bank()).questions:
+        choice_idx = answers.get(q.id)
+        if choice_idx is None: continue
+
+        score = q.choice_scores[choice_idx]
+        cat = results[q.category]
+        cat['score'] += score
+        cat['max'] += q.max_score
+
+        item_detail = {
+            'topic': q.short_topic,
+            'category': q.category,
+            'score': score,
+            'advice': q.advice_by_score[score],
+            'severity': q.severity
+        }
+        
+        if score <= 1:
+            gaps.append(item_detail)
+        else:
+            strengths.append(item_detail)
+
+    # 2. BMI Calculation
+    if weight and height:
+        bmi_score, bmi_advice, bmi_severity, bmi_max = calculate_bmi(weight, height)
+        results['Physical']['score'] += bmi_score
+        results['Physical']['max'] += bmi_max
+        
+        bmi_detail = {
+            'topic': BMI_TOPIC,
+            'category': 'Physical',
+            'score': bmi_score,
+            'advice': bmi_advice,
+            'severity': bmi_severity
+        }
+        
+        if bmi_score <= 1:
+            gaps.append(bmi_detail)
+        else:
+            strengths.append(bmi_detail)
+
+    # Sort Gaps by Severity (Critical first)
+    gaps.sort(key=lambda x: x['severity'], reverse=True)
+
+    return results, strengths, gaps
+
+
+ALL_GOOD_SUMMARY = "สุขภาพโดยรวมของคุณอยู่ในเกณฑ์ดีเยี่ยม! ไม่มีจุดที่ต้องกังวลเป็นพิเศษ รักษาความสมดุลนี้ไว้นะครับ"
+_SUMMARY_INTRO = "จากการวิเคราะห์ พบว่ามีบางจุดที่คุณควรหันมาดูแลใส่ใจเพิ่มขึ้น โดยเรียงลำดับตามความสำคัญครับ:<br><br>"
+_SUMMARY_HEADERS = {'Physical': "<b>💪 ด้านสุขภาพกาย:</b><br>", 'Mental': "<b>🧠 ด้านสุขภาพจิต:</b><br>"}
+
+
+@lru_cache(maxsize=None)
+def _gap_open(topic, severity):
+    # Icon and color by severity
+    icon = "🔴 " if severity >= 3 else "🟡 " if severity == 2 else "🔵 "
+    color = "#D32F2F" if severity >= 3 else "#F57C00" if severity == 2 else "#1976D2"
+    return f"<div style='color: {color}; margin-bottom: 5px;'>{icon}<b>{topic}:</b> "
+
+
+@lru_cache(maxsize=None)
+def _strength_open(topic):
+    return ("<div style='background: #E8F5E9; padding: 15px; border-radius: 12px; margin-bottom: 10px; "
+            f"border-left: 5px solid #2E7D32;'><b>✅ {topic}</b>: ")
+
+
+# HTML per (topic, score), fixed by the question bank. BMI advice contains the
+# person's BMI, so only its opening tag is cached (per topic and severity band).
+SummaryFragments = namedtuple('SummaryFragments', 'gap strength')
+_fragments_by_digest = {}
+
+
+def summary_fragments(bank=None):
+    bank = bank or data.current_bank()
+    fragments = _fragments_by_digest.get(bank.digest)
+    if fragments is None:
+        gap, strength = {}, {}
+        for q in bank.questions:
+            for score, advice in enumerate(q.advice_by_score):
+                gap[(q.short_topic, score)] = _gap_open(q.short_topic, q.severity) + advice + "</div>"
+                strength[(q.short_topic, score)] = _strength_open(q.short_topic) + advice + "</div>"
+        fragments = _fragments_by_digest[bank.digest] = SummaryFragments(gap, strength)
+    return fragments
+
+
+@timed("generate_summary")
+def generate_summary(gaps, bank=None):
+    """
+    Generate summary grouped by category and sorted by severity.
+    """
+    if not gaps:
+        return ALL_GOOD_SUMMARY
+
+    table = summary_fragments(bank).gap
+    parts = {'Physical': [], 'Mental': []}
+    seen = {'Physical': set(), 'Mental': set()}
+    for item in gaps:
+        cat, advice = item['category'], item['advice']
+        if cat not in parts or advice in seen[cat]:
+            continue
+        seen[cat].add(advice)
+        html = table.get((item['topic'], item['score']))
+        parts[cat].append(html if html is not None else _gap_open(item['topic'], item['severity']) + advice + "</div>")
+
+    out = [_SUMMARY_INTRO]
+    if parts['Physical']:
+        out += [_SUMMARY_HEADERS['Physical'], *parts['Physical'], "<br>"]
+    if parts['Mental']:
+        out += [_SUMMARY_HEADERS['Mental'], *parts['Mental']]
+    return "".join(out)
+
+
+def generate_strengths_html(strengths, bank=None):
+    """
+    The strength cards of the results page, as one HTML string.
+    """
+    table = summary_fragments(bank).strength
+    out = []
+    for item in strengths:
+        html = table.get((item['topic'], item['score']))
+        out.append(html if html is not None else _strength_open(item['topic']) + item['advice'] + "</div>")
+    return "".join(out)
+
+
+# Process-wide counters for the session-state results memo (hit rate in production)
+results_memo_stats = {'hits': 0, 'misses': 0}
+
+
+def _results_digest(answers, weight, height, bank_version=None):
+    return hashlib.sha1(repr((sorted(answers.items()), weight, height, bank_version)).encode()).hexdigest()
+
+
+def get_memoized_results(state):
+    """
+    calculate_results + generate_summary for the current session, computed once.
+    `state` is st.session_state (or any mapping with answers/weight/height, and
+    optionally the bank_version the session is pinned to);
+    the memo is stored in state['results_memo'] and rebuilt only when an input changes.
+    Returns dict with keys: results, strengths, gaps, summary_html, strengths_html.
+    """
+    bank_version = state.get('bank_version')
+    digest = _results_digest(state['answers'], state['weight'], state['height'], bank_version)
+    memo = state.get('results_memo')
+    if memo is not None and memo['digest'] == digest:
+        results_memo_stats['hits'] += 1
+        return memo
+
+    results_memo_stats['misses'] += 1
+    bank = data.get_bank(bank_version)
+    results, strengths, gaps = calculate_results(state['answers'], weight=state['weight'], height=state['height'],
+                                                 bank=bank)
+    memo = {
+        'digest': digest,
+        'results': results,
+        'strengths': strengths,
+        'gaps': gaps,
+        'summary_html': generate_summary(gaps, bank=bank),
+        'strengths_html': generate_strengths_html(strengths, bank=bank),
+    }
+    state['results_memo'] = memo
+    return memo
@@ -0,0 +1,244 @@
+"""
+State shared by every Streamlit process on the host, for running several workers
+behind a load balancer (enabled by the shared_state path in config.py):
+
+- SessionStore: assessment progress keyed by a session token (carried in the URL),
+  so a user can continue on whichever worker serves the next request;
+- SharedOutbox: the write-behind queue for remote backends as a table, so rows
+  survive a worker restart and any live worker flushes them.
+
+Both live in one SQLite file (WAL), which every process opens.
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Session keys that make up a user's progress
+SESSION_KEYS = ('step', 'q_idx', 'answers', 'weight', 'height', 'age', 'consent', 'interest', 'email', 'save_key',
+                'bank_version', 'lead_status', 'save_result')
+# Not kept once the assessment is finished (the email has gone to the lead sink by then)
+FINAL_DROPPED_KEYS = ('email',)
+# Sessions untouched for this long are deleted; checked on open and then every PRUNE_INTERVAL
+SESSION_MAX_AGE = 24 * 3600
+PRUNE_INTERVAL = 3600
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SessionStore:
+    def __init__(self, path, max_age=SESSION_MAX_AGE, prune_interval=PRUNE_INTERVAL):
+        self.path = path
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sessions "
+                           "(token TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)")
+        self.prune()
+
+    @staticmethod
+    def encode(state):
+        dropped = FINAL_DROPPED_KEYS if state.get('step') == 'final' else ()
+        return json.dumps({k: state[k] for k in SESSION_KEYS if k in state and k not in dropped},
+                          ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+    def load(self, token):
+        with self._lock:
+            found = self._conn.execute("SELECT state FROM sessions WHERE token = ?", (token,)).fetchone()
+        if found is None:
+            return None
+        state = json.loads(found[0])
+        # JSON object keys are strings; question ids are ints
+        if 'answers' in state:
+            state['answers'] = {int(k): v for k, v in state['answers'].items()}
+        return state
+
+    def save(self, token, encoded):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sessions (token, state, updated) VALUES (?, ?, ?)",
+                               (token, encoded, time.time()))
+        if time.monotonic() >= self._next_prune:
+            self.prune()
+
+    def delete(self, token):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def prune(self, max_age=None):
+        """
+        Delete sessions not saved for `max_age` seconds (default: the store's); returns how many.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            self._next_prune = time.monotonic() + self.prune_interval
+            return self._conn.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - max_age,)).rowcount
+
+
+class SharedOutbox:
+    """
+    Cross-process replacement for WriteBehindQueue. put() commits the row to the
+    outbox table; a flusher thread in each process claims up to `max_batch` rows
+    for `lease` seconds, writes them with sink.append_many and deletes them.
+    Rows whose worker died mid-write are claimed again once the lease expires.
+    Sinks are stored by key and looked up with resolve_sink(key); rows that fail
+    `max_attempts` times go to on_failure(sink_key, rows, error).
+    """
+
+    def __init__(self, path, resolve_sink, max_batch=50, poll=0.5, lease=60, max_attempts=5, on_failure=None):
+        self.path = path
+        self.resolve_sink = resolve_sink
+        self.max_batch = max_batch
+        self.poll = poll
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.on_failure = on_failure
+        self.flushed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY, sink TEXT NOT NULL, "
+                           "row TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                           "claimed_until REAL NOT NULL DEFAULT 0)")
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="shared-outbox", daemon=True)
+        self._thread.start()
+
+    def put(self, sink_key, row):
+        with self._lock:
+            self._conn.execute("INSERT INTO outbox (sink, row) VALUES (?, ?)",
+                               (sink_key, json.dumps(row, ensure_ascii=False)))
+        return True
+
+    def pending(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def flush(self, timeout=None):
+        """
+        Block until the outbox is empty (rows written by any process, or given up on).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout=10.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _claim(self):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                claimed = self._conn.execute(
+                    "SELECT id, sink, row, attempts FROM outbox WHERE claimed_until < ? ORDER BY id LIMIT ?",
+                    (now, self.max_batch)).fetchall()
+                if claimed:
+                    self._conn.executemany("UPDATE outbox SET claimed_until = ?, attempts = attempts + 1 WHERE id = ?",
+                                           [(now + self.lease, c[0]) for c in claimed])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def _delete(self, ids, until):
+        """
+        Delete written rows, retrying while the database is busy until the lease ends
+        (after that another worker claims them and would write them again).
+        """
+        delay = 0.05
+        while True:
+            try:
+                with self._lock:
+                    self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+                return
+            except sqlite3.Error:
+                if time.time() + delay >= until:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+    def _release(self, ids, delay):
+        with self._lock:
+            self._conn.executemany("UPDATE outbox SET claimed_until = ? WHERE id = ?",
+                                   [(time.time() + delay, i) for i in ids])
+
+    def _write(self, sink_key, claimed, until):
+        ids = [c[0] for c in claimed]
+        rows = [json.loads(c[2]) for c in claimed]
+        try:
+            sink = self.resolve_sink(sink_key)
+            sink.append_many(rows)
+        except Exception as error:
+            attempts = max(c[3] for c in claimed) + 1
+            if attempts < self.max_attempts:
+                self._release(ids, min(2 ** attempts, self.lease))
+                return
+            self.failed += len(rows)
+            if self.on_failure:
+                try:
+                    self.on_failure(sink_key, rows, error)
+                except Exception:
+                    return  # keep the rows; claimed again when the lease expires
+        else:
+            self.flushed += len(rows)
+        self._delete(ids, until)
+
+    def _run(self):
+        while not self._stop.is_set():
+            until = time.time() + self.lease
+            try:
+                claimed = self._claim()
+            except sqlite3.Error:
+                claimed = []
+            if not claimed:
+                self._stop.wait(self.poll)
+                continue
+            by_sink = {}
+            for c in claimed:
+                by_sink.setdefault(c[1], []).append(c)
+            for sink_key, group in by_sink.items():
+                try:
+                    self._write(sink_key, group, until)
+                except sqlite3.Error as e:
+                    # The rows stay in the outbox and are claimed again when the lease expires
+                    print(f"Shared outbox: {e}", file=sys.stderr)
+
+
+_stores = {}
+_outboxes = {}
+_shared_lock = threading.Lock()
+
+
+def get_session_store(path):
+    with _shared_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SessionStore(path)
+        return store
+
+
+def get_shared_outbox(path, resolve_sink, on_failure=None):
+    """
+    One outbox (and flusher thread) per process for the shared file.
+    """
+    import atexit
+
+    with _shared_lock:
+        outbox = _outboxes.get(path)
+        if outbox is None:
+            outbox = _outboxes[path] = SharedOutbox(os.fspath(path), resolve_sink, on_failure=on_failure)
+            atexit.register(outbox.close)
+        return outbox
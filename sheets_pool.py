@@ -0,0 +1,113 @@
+"""
+Process-wide Google Sheets client shared by every session.
+
+Authenticates once from the [connections.gsheets] service-account secrets, keeps
+one keep-alive HTTP connection pool, refreshes the access token before it
+expires, and caps concurrent API calls with a semaphore so bursts stay under quota.
+"""
+import datetime
+import threading
+from contextlib import contextmanager
+
+SCOPES = (
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+)
+
+
+def _utcnow():
+    # google-auth stores expiry as naive UTC
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class SheetsClientPool:
+    def __init__(self, service_account_info=None, max_in_flight=4, refresh_margin=300,
+                 credentials=None, client=None):
+        self.refresh_margin = datetime.timedelta(seconds=refresh_margin)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._refresh_lock = threading.Lock()
+        self._worksheets = {}
+        self._worksheets_lock = threading.Lock()
+        self.refreshes = 0
+
+        if client is None:
+            import gspread
+            from google.auth.transport.requests import AuthorizedSession
+            from google.oauth2.service_account import Credentials
+            from requests.adapters import HTTPAdapter
+
+            credentials = Credentials.from_service_account_info(service_account_info, scopes=SCOPES)
+            session = AuthorizedSession(credentials)
+            session.mount("https://", HTTPAdapter(pool_connections=max_in_flight, pool_maxsize=max_in_flight))
+            client = gspread.Client(credentials, session=session)
+        self.credentials = credentials
+        self.client = client
+
+    def _ensure_token(self):
+        creds = self.credentials
+        if creds is None or (creds.valid and creds.expiry and creds.expiry - _utcnow() > self.refresh_margin):
+            return
+        with self._refresh_lock:
+            if creds.valid and creds.expiry and creds.expiry - _utcnow() > self.refresh_margin:
+                return
+            from google.auth.transport.requests import Request
+            creds.refresh(Request())
+            self.refreshes += 1
+
+    @contextmanager
+    def slot(self):
+        """
+        One in-flight API call, with a fresh token.
+        """
+        with self._slots:
+            self._ensure_token()
+            yield
+
+    def worksheet(self, sheet_url, worksheet=None):
+        """
+        Guarded worksheet handle, opened once per (sheet, worksheet).
+        """
+        key = (sheet_url, worksheet)
+        with self._worksheets_lock:
+            handle = self._worksheets.get(key)
+            if handle is None:
+                with self.slot():
+                    spreadsheet = self.client.open_by_url(sheet_url)
+                    if isinstance(worksheet, str):
+                        ws = spreadsheet.worksheet(worksheet)
+                    else:
+                        ws = spreadsheet.get_worksheet(worksheet or 0)
+                handle = self._worksheets[key] = GuardedWorksheet(ws, self)
+            return handle
+
+
+class GuardedWorksheet:
+    """
+    Worksheet proxy: every method call runs inside a pool slot.
+    """
+
+    def __init__(self, worksheet, pool):
+        self._worksheet = worksheet
+        self._pool = pool
+
+    def __getattr__(self, name):
+        attr = getattr(self._worksheet, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._pool.slot():
+                return attr(*args, **kwargs)
+        return call
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_sheets_pool(service_account_info, max_in_flight=4):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SheetsClientPool(service_account_info, max_in_flight=max_in_flight)
+        return _pool
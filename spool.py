@@ -0,0 +1,204 @@
+import json
+import os
+import struct
+import threading
+import zlib
+
+from locks import file_lock
+
+SPOOL_PATH = "assessment_spool.log"
+
+# Record layout: 4-byte big-endian payload length, 4-byte CRC32 of the payload, JSON payload.
+_HEADER = struct.Struct(">II")
+
+
+def encode_record(row):
+    payload = json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode(payload, length, crc):
+    if len(payload) < length or zlib.crc32(payload) != crc:
+        return None
+    try:
+        return json.loads(payload.decode("utf-8"))
+    except ValueError:
+        return None
+
+
+def _find_record(data, start):
+    """
+    Offset of the first valid record in `data` at or after `start`, or None.
+    """
+    for i in range(start, len(data) - _HEADER.size + 1):
+        length, crc = _HEADER.unpack_from(data, i)
+        end = i + _HEADER.size + length
+        if end <= len(data) and _decode(data[i + _HEADER.size:end], length, crc) is not None:
+            return i
+    return None
+
+
+class Spool:
+    """
+    Durable append-only log of rows that could not reach the primary backend.
+
+    Every append is a single os.write on an O_APPEND descriptor followed by fsync,
+    so concurrent appenders (threads or processes) never need a lock and a record
+    is never interleaved with another. A torn record at the tail (crash mid-write)
+    is ignored by the reader; one in the middle (more rows appended after the
+    crash) is moved to `<path>.corrupt` on replay and the records after it are read.
+    Replays hold a file lock, so worker processes sharing the spool take turns.
+    """
+
+    def __init__(self, path=SPOOL_PATH):
+        self.path = path
+        self.offset_path = path + ".offset"
+        self.corrupt_path = path + ".corrupt"
+        self._replay_lock = threading.Lock()
+
+    def append(self, row):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        data = b"".join(encode_record(r) for r in rows)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def read(self, start=0, on_corrupt=None):
+        """
+        Yield (end_offset, row) for every complete record after `start`.
+        Bytes that are not a valid record (a torn write with later appends after it)
+        are skipped up to the next valid record and passed to on_corrupt(offset, data).
+        Invalid bytes with no valid record after them are a torn tail and end the read.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(start)
+            pos = start
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                length, crc = _HEADER.unpack(header)
+                row = _decode(f.read(length), length, crc)
+                if row is None:
+                    f.seek(pos)
+                    rest = f.read()
+                    skip = _find_record(rest, 1)
+                    if skip is None:
+                        return
+                    if on_corrupt is not None:
+                        on_corrupt(pos, rest[:skip])
+                    pos += skip
+                    f.seek(pos)
+                    continue
+                pos += _HEADER.size + length
+                yield pos, row
+
+    def _quarantine(self, offset, data):
+        with open(self.corrupt_path, "ab") as f:
+            f.write(data)
+
+    def committed_offset(self):
+        try:
+            with open(self.offset_path) as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _commit(self, offset):
+        tmp = f"{self.offset_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.offset_path)
+
+    def has_pending(self):
+        try:
+            return os.path.getsize(self.path) > self.committed_offset()
+        except OSError:
+            return False
+
+    def replay(self, sink, batch_size=100):
+        """
+        Drain spooled rows into `sink` (anything with append_many). Rows whose
+        Submission_ID the sink already holds are skipped, so a crash between the
+        append and the offset commit never produces duplicates.
+        Returns the number of rows sent.
+        """
+        if not self._replay_lock.acquire(blocking=False):
+            return 0
+        try:
+            with file_lock(self.path):
+                return self._replay(sink, batch_size)
+        finally:
+            self._replay_lock.release()
+
+    def _replay(self, sink, batch_size):
+        # Under the file lock: the offset and the sink's IDs include any other process's replay
+        known = set(sink.existing_ids()) if hasattr(sink, "existing_ids") else set()
+        sent = 0
+        batch, end = [], None
+        for end, row in self.read(self.committed_offset(), on_corrupt=self._quarantine):
+            sid = row.get("Submission_ID")
+            if sid and sid in known:
+                continue
+            known.add(sid)
+            batch.append(row)
+            if len(batch) >= batch_size:
+                sink.append_many(batch)
+                sent += len(batch)
+                batch = []
+                self._commit(end)
+        if batch:
+            sink.append_many(batch)
+            sent += len(batch)
+        if end is not None:
+            self._commit(end)
+        return sent
+
+
+_spools = {}
+_spools_lock = threading.Lock()
+
+
+def spool_path(name):
+    return SPOOL_PATH if name == "sheets" else f"assessment_spool.{name}.log"
+
+
+def get_spool(name="sheets"):
+    """
+    One spool per backend name, so each replays into the backend it missed.
+    """
+    with _spools_lock:
+        spool = _spools.get(name)
+        if spool is None:
+            spool = _spools[name] = Spool(spool_path(name))
+        return spool
+
+
+def replay_in_background(sink):
+    """
+    Start a replay thread when the sink's spool has undelivered rows.
+    """
+    spool = get_spool(getattr(sink, "name", "sheets"))
+    if not spool.has_pending():
+        return None
+
+    def run():
+        try:
+            spool.replay(sink)
+        except Exception:
+            pass  # backend still unavailable; the rows stay spooled for the next attempt
+
+    thread = threading.Thread(target=run, name="spool-replay", daemon=True)
+    thread.start()
+    return thread
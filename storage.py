@@ -0,0 +1,335 @@
+import csv
+import os
+import sqlite3
+import sys
+import threading
+
+
+class HeaderConflictError(Exception):
+    pass
+
+
+class StorageBackend:
+    """
+    Where submissions go. Rows are dicts keyed by column name (see persistence.build_submission_row).
+    `remote` backends are written through the write-behind queue; local ones synchronously.
+    """
+    name = "backend"
+    remote = False
+
+    def append(self, row):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        raise NotImplementedError
+
+    def scan(self, filters=None):
+        """
+        Yield stored rows (dicts) whose columns equal every value in `filters`.
+        """
+        raise NotImplementedError
+
+    def existing_ids(self, column="Submission_ID"):
+        return [row.get(column) for row in self.scan()]
+
+
+def _matches(row, filters):
+    return all(str(row.get(k, "")) == str(v) for k, v in filters.items())
+
+
+def _column_letter(n):
+    """
+    1-based column number -> A1 letters (1 -> A, 27 -> AA).
+    """
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def _range_width(a1_range):
+    """
+    Number of columns in an A1 range such as "Sheet1!A1:K42".
+    """
+    cells = a1_range.rsplit("!", 1)[-1].split(":")
+    columns = [sum((ord(ch) - ord("A") + 1) * 26 ** i
+                   for i, ch in enumerate(reversed(cell.rstrip("0123456789").upper())))
+               for cell in cells]
+    return columns[-1] - columns[0] + 1
+
+
+class SheetsAppendWriter(StorageBackend):
+    """
+    Append rows to a worksheet without downloading the existing data.
+    Rows are dicts keyed by column name; the header row is read once and cached.
+    """
+    name = "sheets"
+    remote = True
+
+    def __init__(self, worksheet, max_retries=3):
+        self.worksheet = worksheet
+        self.max_retries = max_retries
+        self._header = None
+        self._lock = threading.Lock()
+
+    def _ensure_header(self, columns):
+        """
+        Make sure every column exists in row 1. The header is only ever extended:
+        new columns are written into the cells after the current last one, and only
+        while a fresh read of row 1 still matches the cached header. A write that
+        another process overwrote is detected by the verify read and retried.
+        """
+        for _ in range(self.max_retries):
+            if self._header is None:
+                self._header = self.worksheet.row_values(1)
+
+            missing = [c for c in columns if c not in self._header]
+            if not missing:
+                return self._header
+
+            expected = list(self._header)
+            current = self.worksheet.row_values(1)
+            if current != expected:
+                self._header = current
+                continue
+
+            new_header = expected + missing
+            self.worksheet.update(range_name=f"{_column_letter(len(expected) + 1)}1", values=[missing])
+            if self.worksheet.row_values(1)[:len(new_header)] == new_header:
+                self._header = new_header
+                return new_header
+            self._header = None
+
+        raise HeaderConflictError("Header row kept changing while adding columns")
+
+    def _check_append(self, response, header):
+        """
+        The append response gives the table's width; when it differs from the header
+        used, row 1 changed since it was cached and is read again. Columns are only
+        ever added, so the header used must still be its prefix; otherwise the rows
+        just appended sit under other labels, which is reported.
+        """
+        table_range = response.get('tableRange') if isinstance(response, dict) else None
+        if not table_range or _range_width(table_range) == len(header):
+            return
+        current = self.worksheet.row_values(1)
+        with self._lock:
+            self._header = current
+        if current[:len(header)] != header:
+            # Not retried: the rows are in the sheet, a retry would add them a second time
+            print(f"Sheet header changed under this writer: rows appended as {header}, "
+                  f"row 1 is now {current}", file=sys.stderr)
+
+    def existing_ids(self, column="Submission_ID"):
+        """
+        All values of one column (used by the spool replayer to skip rows already delivered).
+        """
+        header = self.worksheet.row_values(1)
+        if column not in header:
+            return []
+        return self.worksheet.col_values(header.index(column) + 1)[1:]
+
+    def append(self, row):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        """
+        Server-side append (values.append) so concurrent writers never overwrite each other.
+        """
+        if not rows:
+            return
+        columns = []
+        for row in rows:
+            columns.extend(c for c in row if c not in columns)
+
+        with self._lock:
+            header = list(self._ensure_header(columns))
+
+        values = [[row.get(col, "") for col in header] for row in rows]
+        response = self.worksheet.append_rows(values, value_input_option="USER_ENTERED",
+                                              insert_data_option="INSERT_ROWS", table_range="A1")
+        self._check_append(response, header)
+
+    def scan(self, filters=None):
+        """
+        Full download; for reports and replays, never on the submission path.
+        """
+        values = self.worksheet.get_all_values()
+        if not values:
+            return
+        header = values[0]
+        for raw in values[1:]:
+            row = dict(zip(header, raw))
+            if not filters or _matches(row, filters):
+                yield row
+
+
+class CsvBackend(StorageBackend):
+    """
+    Append-only CSV file. `columns` is the header of a new file; columns first seen
+    in a row are added to the header (the file is rewritten once per new column set).
+    """
+    name = "csv"
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self._lock = threading.Lock()
+
+    def _file_header(self):
+        try:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                return next(csv.reader(f), None)
+        except FileNotFoundError:
+            return None
+
+    def append_many(self, rows):
+        with self._lock:
+            header = self._file_header()
+            columns = list(header or self.columns)
+            for row in rows:
+                for col in row:
+                    if col not in columns:
+                        columns.append(col)
+            if header and columns != header:
+                self._add_columns(columns)
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                if not header:
+                    writer.writeheader()
+                writer.writerows(rows)
+
+    def _add_columns(self, columns):
+        """
+        Rewrite the file with a wider header (e.g. Q<id> of a newer question bank);
+        existing rows get blanks, like new header cells in the sheet.
+        """
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(self.path, newline="", encoding="utf-8") as src, \
+                open(tmp, "w", newline="", encoding="utf-8") as dst:
+            reader = csv.reader(src)
+            next(reader, None)
+            writer = csv.writer(dst)
+            writer.writerow(columns)
+            writer.writerows(r + [""] * (len(columns) - len(r)) for r in reader)
+        os.replace(tmp, self.path)
+
+    def scan(self, filters=None):
+        try:
+            f = open(self.path, newline="", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for row in csv.DictReader(f):
+                if not filters or _matches(row, filters):
+                    yield row
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Local system of record. WAL journal so readers never block the writer; every
+    append_many is one transaction of executemany over a single (cached) INSERT.
+    Submission_ID is unique, so replays are idempotent (INSERT OR IGNORE).
+    Columns are added on first sight (ALTER TABLE), like new header cells in the sheet.
+    """
+    name = "sqlite"
+
+    def __init__(self, path, table="responses", columns=()):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ("Submission_ID" UNIQUE)')
+        self._columns = self._read_columns()
+        self._insert_sql = {}
+        with self._lock:
+            self._add_columns(columns)
+
+    def _read_columns(self):
+        return [r[1] for r in self._conn.execute(f'PRAGMA table_info("{self.table}")')]
+
+    def _add_columns(self, columns):
+        for col in columns:
+            if col not in self._columns:
+                if '"' in col:
+                    raise ValueError(f"Invalid column name: {col!r}")
+                self._conn.execute(f'ALTER TABLE "{self.table}" ADD COLUMN "{col}"')
+                self._columns.append(col)
+
+    def _insert_for(self, cols):
+        sql = self._insert_sql.get(cols)
+        if sql is None:
+            names = ", ".join(f'"{c}"' for c in cols)
+            sql = f'INSERT OR IGNORE INTO "{self.table}" ({names}) VALUES ({", ".join("?" * len(cols))})'
+            self._insert_sql[cols] = sql
+        return sql
+
+    def append_many(self, rows):
+        if not rows:
+            return
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(row), []).append(tuple(row.values()))
+        with self._lock:
+            for cols in groups:
+                self._add_columns(cols)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for cols, values in groups.items():
+                    self._conn.executemany(self._insert_for(cols), values)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def scan(self, filters=None, batch_size=1000):
+        """
+        Streams the rows in batches on a separate read connection (a WAL snapshot),
+        so a long scan neither holds the table in memory nor blocks appends.
+        """
+        filters = filters or {}
+        with self._lock:
+            if any(k not in self._columns for k in filters):
+                return
+        where = " AND ".join(f'"{k}" = ?' for k in filters)
+        sql = f'SELECT * FROM "{self.table}"' + (f" WHERE {where}" if where else "")
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(sql, tuple(filters.values()))
+            names = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for values in rows:
+                    yield dict(zip(names, values))
+        finally:
+            conn.close()
+
+    def existing_ids(self, column="Submission_ID"):
+        with self._lock:
+            return [r[0] for r in self._conn.execute(f'SELECT "{column}" FROM "{self.table}"')]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_registered_writer(sheet_url):
+    with _writers_lock:
+        return _writers.get(sheet_url)
+
+
+def set_sheet_writer(sheet_url, writer):
+    """
+    Register a writer for a sheet URL (e.g. SheetsAppendWriter(tests.fakes.FakeWorksheet()) in load tests).
+    """
+    with _writers_lock:
+        _writers[sheet_url] = writer
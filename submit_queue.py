@@ -0,0 +1,123 @@
+import atexit
+import queue
+import threading
+import time
+
+
+class WriteBehindQueue:
+    """
+    Process-wide buffer between the UI and slow sinks (e.g. Google Sheets).
+    Items are (sink, row); a background thread groups rows per sink and calls
+    sink.append_many(rows) when `max_batch` rows are waiting or `max_delay`
+    seconds have passed since the first one arrived. Rows that still fail after
+    the retries are passed to on_failure(sink, rows, error).
+    """
+
+    def __init__(self, max_batch=50, max_delay=2.0, max_pending=5000,
+                 max_retries=5, backoff=0.5, on_failure=None):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.on_failure = on_failure
+        self.flushed = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, sink, row):
+        """
+        Returns False when the buffer is full so the caller can write synchronously instead.
+        """
+        try:
+            self._queue.put_nowait((sink, row))
+            return True
+        except queue.Full:
+            return False
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self, timeout=None):
+        """
+        Block until everything enqueued so far has been written (or given up on).
+        """
+        if timeout is None:
+            self._queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout=10.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _collect(self):
+        """
+        Wait for the first item, then keep taking items until the batch is full or the delay expires.
+        """
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = 0 if self._stop.is_set() else deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, sink, rows):
+        for attempt in range(self.max_retries + 1):
+            try:
+                sink.append_many(rows)
+                self.flushed += len(rows)
+                return
+            except Exception as e:
+                error = e
+                if attempt < self.max_retries and not self._stop.is_set():
+                    time.sleep(self.backoff * (2 ** attempt))
+        self.failed += len(rows)
+        if self.on_failure:
+            try:
+                self.on_failure(sink, rows, error)
+            except Exception:
+                pass
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if not batch:
+                continue
+            by_sink = {}
+            for sink, row in batch:
+                by_sink.setdefault(id(sink), (sink, []))[1].append(row)
+            for sink, rows in by_sink.values():
+                self._write(sink, rows)
+            for _ in batch:
+                self._queue.task_done()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_submission_queue(on_failure=None):
+    """
+    Lazily start the shared queue; it is flushed when the interpreter exits.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(on_failure=on_failure)
+            atexit.register(_queue.close)
+        return _queue
@@ -0,0 +1,124 @@
+import csv
+import json
+import os
+
+import pytest
+
+from aggregates import LiveAggregates, empty_state, main, rebuild
+
+
+def test_running_totals_match_rebuild_from_history(tmp_path, capsys, random_responses):
+    df = random_responses(150, seed=5)
+    source = str(tmp_path / "r.csv")
+    df.to_csv(source, index=False)
+    state = str(tmp_path / "agg.json")
+
+    live = LiveAggregates(state)
+    with open(source, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            live.add_row(row, save=False)
+    live.save()
+
+    assert LiveAggregates.load(state).state == rebuild(source, chunksize=17).state
+    stats = live.stats()
+    assert stats['count'] == 150
+    assert sum(stats['bmi_bands'].values()) == 150
+    assert sum(stats['Physical']['levels'].values()) == 150
+    assert main(["rebuild", source, "--state", state, "--check"]) == 0
+
+    with open(state) as f:
+        tampered = json.load(f)
+    tampered['choices']['1'][0] += 1
+    with open(state, "w") as f:
+        json.dump(tampered, f)
+    assert main(["rebuild", source, "--state", state, "--check"]) == 1
+    assert "choices.1" in capsys.readouterr().out
+
+
+def test_percentiles_and_merged_updates_from_two_processes(tmp_path):
+    from aggregates import ScoreDistribution
+
+    dist = ScoreDistribution([1, 0, 2, 1])
+    assert [dist.percentile(s) for s in (0, 1, 2, 3, 99)] == [0, 25, 25, 75, 75]
+    assert ScoreDistribution([0, 0]).percentile(1) is None
+
+    # Two workers sharing one state file: neither overwrites the other's updates
+    state = str(tmp_path / "agg.json")
+    a, b = LiveAggregates.load(state), LiveAggregates.load(state)
+    rows = [{'Q11': 4, 'Q12': 4}, {'Q11': 1}, {'Q11': 2, 'Q12': 3}]
+    for i, row in enumerate(rows):
+        (a if i % 2 else b).add_row(row)
+    merged = LiveAggregates.load(state)
+    assert merged.state['count'] == 3
+    assert merged.percentile('Mental', 6) == 2 / 3 * 100
+
+    a.refresh(force=True)
+    assert a.distribution('Mental').total == 3
+
+    # Another worker's save within the same mtime tick is still merged, not overwritten
+    a.add_row(rows[1])
+    saved_mtime = os.stat(state).st_mtime_ns
+    b.add_row(rows[1])
+    os.utime(state, ns=(saved_mtime, saved_mtime))
+    a.add_row(rows[1])
+    assert LiveAggregates.load(state).state['count'] == 6
+
+
+def test_rows_are_counted_against_their_bank_version(tmp_path):
+    import pandas as pd
+    import data
+
+    # v3 drops question 1 and adds question 99 with five choices
+    with open(data.BANK_PATH, encoding="utf-8") as f:
+        spec = json.load(f)
+    spec['version'] = 3
+    spec['questions'] = spec['questions'][1:] + [dict(spec['questions'][0], id=99, choices=[
+        {'text': str(i), 'score': min(i, 3)} for i in range(5)])]
+    path = str(tmp_path / "bank_v3.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False)
+    data.register_bank(data.load_bank(path))
+
+    rows = [{'Q1': 1, 'Q2': 2, 'Weight': 60, 'Height': 170, 'Bank_Version': 1},
+            {'Q99': 5, 'Q2': 1, 'Weight': 80, 'Height': 170, 'Bank_Version': 3},
+            {'Q1': 4, 'Q99': 5, 'Bank_Version': 3}]
+    by_row = LiveAggregates(str(tmp_path / "a.json"))
+    for row in rows:
+        by_row.add_row(row, save=False)
+    by_frame = LiveAggregates(str(tmp_path / "b.json"))
+    by_frame.add_frame(pd.DataFrame(rows))
+
+    assert by_frame.state == by_row.state
+    assert '99' in empty_state(data.get_bank(3))['choices'] and '99' not in empty_state()['choices']
+    assert by_frame.state['choices']['99'] == [0, 0, 0, 0, 2]
+    assert by_frame.state['choices']['1'][0] == 1
+
+    # A version this process never loaded is an error on both paths, not a silent re-score
+    with pytest.raises(data.QuestionBankError):
+        by_row.add_row({'Q1': 1, 'Bank_Version': 42}, save=False)
+    with pytest.raises(data.QuestionBankError):
+        by_frame.add_frame(pd.DataFrame([{'Q1': 1, 'Bank_Version': 42}]))
+    assert by_row.state['count'] == by_frame.state['count'] == 3
+
+
+def test_rebuild_extends_histograms_beyond_the_saved_range(tmp_path):
+    import pandas as pd
+
+    agg = LiveAggregates(str(tmp_path / "a.json"))
+    agg.state['categories']['Mental']['score_hist'] = [0, 0]
+    agg.state['choices']['1'] = [0]
+    agg.add_frame(pd.DataFrame([{'Q1': 4, 'Q11': 4, 'Q12': 4}]))
+    hist = agg.state['categories']['Mental']['score_hist']
+    assert sum(hist) == 1 and len(hist) > 2
+    assert agg.state['choices']['1'] == [0, 0, 0, 1]
+
+
+def test_bmi_band_matches_the_batch_categories():
+    from aggregates import bmi_band
+    from batch_scoring import calculate_bmi_array
+
+    weights = [None, 0, 60, 60, 53.4, 66.2, 66.5, 72.0, 72.3, 86.6, 86.8, 120, -3]
+    heights = [170, 170, None, -5, 170, 170, 170, 170, 170, 170, 170, 170, 170]
+    batch = calculate_bmi_array([float('nan') if w is None else w for w in weights],
+                                [float('nan') if h is None else h for h in heights]).category
+    assert [bmi_band(w, h) for w, h in zip(weights, heights)] == batch.tolist()
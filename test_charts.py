@@ -0,0 +1,36 @@
+import plotly.io as pio
+
+import charts
+import utils
+
+
+def test_bar_chart_cache_hits_and_matches_fresh_figure():
+    scores = {'Physical': {'score': 17, 'max': 28}, 'Mental': {'score': 21, 'max': 30}}
+    before = dict(utils.bar_chart_cache_stats)
+    fig = utils.create_bar_chart(scores)
+    fig_again = utils.create_bar_chart(scores)
+
+    assert utils.bar_chart_cache_stats['misses'] == before['misses'] + 1
+    assert utils.bar_chart_cache_stats['hits'] == before['hits'] + 1
+    fresh = charts._build_bar_chart(17, 28, 21, 30)
+    assert fig.to_plotly_json() == fresh.to_plotly_json() == fig_again.to_plotly_json()
+    assert pio.to_json(fig, validate=False)
+
+
+def test_reachable_keys_cover_full_assessment():
+    from data import questions
+    answers = {q.id: len(q.choice_texts) - 1 for q in questions}
+    results, _, _ = utils.calculate_results(answers, weight=60, height=170)
+    key = (results['Physical']['score'], results['Physical']['max'],
+           results['Mental']['score'], results['Mental']['max'])
+    assert key in set(utils.reachable_score_keys())
+
+
+def test_utils_import_does_not_load_heavy_modules():
+    import subprocess
+    import sys
+
+    probe = ("import sys, utils; heavy = [m for m in ('pandas', 'charts', 'persistence', 'gspread') "
+             "if m in sys.modules]; print(heavy)")
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,10 @@
+from golden import check_table, load_table
+
+
+def test_scoring_paths_match_golden_table():
+    table = load_table()
+    assert len(table) == 370
+    assert check_table(table, processes=1) == []
+
+    tampered = [dict(table[10], physical=[table[10]['physical'][0] + 1, table[10]['physical'][1]])]
+    assert len(check_table(tampered, processes=1)) == 2  # scalar and score_batch
@@ -0,0 +1,75 @@
+import csv
+
+from leads import (DUPLICATE, INVALID, RATE_LIMITED, SAVED, EmailIndex, LeadSink, RateLimiter, capture_lead,
+                   import_leads, normalize_email)
+
+
+def test_normalized_emails_are_deduplicated_across_processes_and_restarts(tmp_path):
+    assert normalize_email("  John.Doe+Board@GoogleMail.com ") == "johndoe@gmail.com"
+    assert normalize_email("a.b+x@example.co.th") == "a.b@example.co.th"
+    assert normalize_email("not-an-email") is None and normalize_email("+x@gmail.com") is None
+
+    path = str(tmp_path / "leads.db")
+    sink = LeadSink(path)
+    assert sink.add(" Jane.Roe@gmail.com") == SAVED
+    assert sink.add("janeroe+games@GMAIL.com") == DUPLICATE
+    assert sink.add("jane@") == INVALID
+
+    # A second worker appends to the same index; the first sees it before deciding
+    other = LeadSink(path)
+    assert other.add("jane.roe@gmail.com") == DUPLICATE
+    assert other.add("sam@example.com") == SAVED
+    assert sink.add("SAM@example.com") == DUPLICATE
+
+    # A lost index is rebuilt from the store
+    (tmp_path / "leads.db.index").unlink()
+    assert len(LeadSink(path).index) == 2
+
+    dest = tmp_path / "export.csv"
+    assert sink.export(str(dest), batch_size=1) == 2
+    with open(dest, newline="", encoding="utf-8") as f:
+        exported = list(csv.DictReader(f))
+    assert sorted(r['Email'] for r in exported) == ["jane.roe@gmail.com", "sam@example.com"]
+    assert sink.export(str(dest), since="9999") == 0
+
+
+def test_rate_limit_per_session_and_failed_writes_do_not_index(tmp_path):
+    limiter = RateLimiter(limit=2, window=60)
+    assert limiter.allow("a", now=0) and limiter.allow("a", now=1)
+    assert not limiter.allow("a", now=2) and limiter.allow("b", now=2)
+    assert limiter.allow("a", now=61)
+
+    config = {'leads_path': str(tmp_path / "leads.db")}
+    statuses = [capture_lead(f"user{i}@example.com", "session-1", config=config) for i in range(4)]
+    assert statuses == [SAVED, SAVED, SAVED, RATE_LIMITED]
+    assert capture_lead("user9@example.com", "session-2", config=config) == SAVED
+    assert capture_lead("x@example.com", "s", config={'leads_path': ''}) is None
+
+    index = EmailIndex(str(tmp_path / "other.index"))
+
+    def failing_write():
+        raise OSError("disk full")
+
+    try:
+        index.add("ab" * 32, failing_write)
+    except OSError:
+        pass
+    assert "ab" * 32 not in index and index.add("ab" * 32)
+
+    rows = [{'Interest': "สนใจ", 'Email': "old@example.com"}, {'Interest': "สนใจ", 'Email': "OLD@example.com"},
+            {'Interest': "ไม่สนใจ", 'Email': "no@example.com"}, {'Interest': "สนใจ", 'Email': ""}]
+    assert import_leads(LeadSink(str(tmp_path / "imported.db")), rows) == (1, 1)
+
+
+def test_save_to_google_sheet_still_accepts_email():
+    import warnings
+
+    from persistence import save_to_google_sheet
+
+    results = {'Physical': {'score': 1, 'max': 2}, 'Mental': {'score': 1, 'max': 2}}
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        saved = save_to_google_sheet(60, 170, 25, results, {}, "https://example.invalid", email="a@b.co")
+    assert saved[0] is False  # no consent: nothing is stored
+    assert [w.category for w in caught] == [DeprecationWarning]
+    assert caught[0].filename == __file__
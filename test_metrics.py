@@ -0,0 +1,50 @@
+import metrics
+
+
+def test_timed_records_only_when_enabled():
+    calls = []
+
+    @metrics.timed("test.op")
+    def op(x):
+        calls.append(x)
+        return x * 2
+
+    metrics.reset()
+    metrics.configure(enabled=False)
+    assert op(1) == 2
+    assert "test.op" not in metrics.snapshot()
+
+    metrics.configure(enabled=True)
+    try:
+        op(2)
+        with metrics.timer("test.block"):
+            pass
+        metrics.start_timer("test.script")()
+        metrics.start_timer("test.script")(".rerun")
+        snap = metrics.snapshot()
+        assert snap["test.op"]["count"] == 1
+        assert snap["test.block"]["count"] == 1
+        assert snap["test.script"]["count"] == 1
+        assert snap["test.script.rerun"]["count"] == 1
+        text = metrics.render_prometheus()
+        assert 'health_app_duration_seconds_count{op="test.op"} 1' in text
+        assert 'le="+Inf"} 1' in text
+    finally:
+        metrics.configure(enabled=False)
+        metrics.reset()
+    assert calls == [1, 2]
+
+
+def test_profile_sampling(tmp_path):
+    @metrics.timed("test.profiled")
+    def op():
+        return sum(range(100))
+
+    metrics.reset()
+    metrics.configure(enabled=True, profile_rate=1.0)
+    try:
+        op()
+        assert metrics.dump_profile(str(tmp_path / "prof.out"))
+    finally:
+        metrics.configure(enabled=False)
+        metrics.reset()
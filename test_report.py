@@ -0,0 +1,24 @@
+from report import build_report
+from scoring import BMI_TOPIC
+
+
+def test_report_is_chunk_independent_and_matches_scalar_gaps(tmp_path, random_responses, scalar_results):
+    df = random_responses(200, seed=3)
+    df['Age'] = [15 + i % 60 for i in range(len(df))]
+    df['Interest'] = ['สนใจ', 'ไม่สนใจ'] * (len(df) // 2)
+    df['Email'] = ['x@y.z', ''] * (len(df) // 2)
+    path = str(tmp_path / "r.csv")
+    df.to_csv(path, index=False)
+
+    report = build_report(path, chunksize=7)
+    assert report == build_report(path, chunksize=1000)
+    assert report['responses'] == 200
+    assert report['interest'] == {'interested': 100, 'with_email': 100, 'conversion_pct': 50.0}
+
+    expected = {}
+    for _, (_, _, gaps) in scalar_results(df):
+        for gap in gaps:
+            expected[gap['topic']] = expected.get(gap['topic'], 0) + 1
+    got = {g['topic']: g['gaps'] for g in report['gaps_by_topic'] if g['gaps']}
+    assert got == expected
+    assert BMI_TOPIC in got
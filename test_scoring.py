@@ -0,0 +1,177 @@
+import os
+
+import pytest
+
+from data import Question, questions, questions_by_id, category_max
+
+
+def test_question_is_slotted_immutable_and_indexed():
+    q = Question.define(99, "text", "topic", 'Mental',
+                        [{'text': 'a', 'score': 0}, {'text': 'b', 'score': 2}],
+                        {(0, 1): "low", (2,): "high"}, severity=2)
+    assert q.choice_texts == ('a', 'b') and q.choice_scores == (0, 2) and q.max_score == 2
+    assert q.advice_by_score == ("low", "low", "high")
+    assert not hasattr(q, '__dict__')
+    with pytest.raises(AttributeError):
+        q.text = "changed"
+
+    assert all(questions_by_id[q.id] is q for q in questions)
+    assert category_max['Physical'] + category_max['Mental'] == sum(q.max_score for q in questions)
+
+
+def test_score_batch_matches_calculate_results(random_responses, scalar_results):
+    from batch_scoring import score_batch
+    from utils import get_health_label
+
+    df = random_responses(500)
+    out = score_batch(df)
+    for i, (results, strengths, gaps) in scalar_results(df):
+        got = out.loc[i]
+        for cat in ('Physical', 'Mental'):
+            assert got[f'{cat}_Score'] == results[cat]['score']
+            assert got[f'{cat}_Max'] == results[cat]['max']
+            assert got[f'{cat}_Level'] == get_health_label(results[cat]['score'], results[cat]['max'])
+            assert got[f'{cat}_Gaps'] == sum(g['category'] == cat for g in gaps)
+
+
+def test_vectorized_bmi_and_labels_agree_with_scalar():
+    import random
+    import numpy as np
+    from batch_scoring import (calculate_bmi_array, bmi_labels, health_level_array,
+                               health_labels, BMI_NOT_GIVEN)
+    from utils import calculate_bmi, get_health_label
+
+    rng = random.Random(1)
+    heights = [rng.uniform(-10, 230) for _ in range(2000)] + [0.0, 100.0, 100.0, 100.0, 100.0, 100.0]
+    # exact band edges at 1 m: BMI == weight
+    weights = [rng.uniform(-5, 200) for _ in range(2000)] + [50.0, 18.5, 22.9, 22.95, 24.9, 29.9]
+    result = calculate_bmi_array(weights, heights)
+    labels = bmi_labels(result)
+    for i, (w, h) in enumerate(zip(weights, heights)):
+        if not w or not h:
+            assert result.category[i] == BMI_NOT_GIVEN
+            continue
+        score, label, severity, max_score = calculate_bmi(w, h)
+        assert (result.score[i], result.severity[i], result.max[i], labels[i]) == (score, severity, max_score, label)
+
+    scores = [rng.randint(0, 70) for _ in range(2000)]
+    maxes = [rng.randint(-1, 70) for _ in range(2000)]
+    codes = health_level_array(scores, maxes)
+    assert health_labels(codes) == [get_health_label(s, m) for s, m in zip(scores, maxes)]
+
+
+def test_results_memo_recomputes_only_on_change():
+    from utils import get_memoized_results, results_memo_stats, calculate_results, generate_summary
+
+    state = {'answers': {q.id: 1 for q in questions}, 'weight': 70.0, 'height': 175.0}
+    before = dict(results_memo_stats)
+    first = get_memoized_results(state)
+    assert get_memoized_results(state) is first
+    assert results_memo_stats['hits'] == before['hits'] + 1
+
+    results, strengths, gaps = calculate_results(state['answers'], weight=70.0, height=175.0)
+    assert (first['results'], first['gaps'], first['summary_html']) == (results, gaps, generate_summary(gaps))
+
+    state['answers'][1] = 3
+    assert get_memoized_results(state) is not first
+    assert results_memo_stats['misses'] == before['misses'] + 2
+
+
+def test_summary_fragments_match_items_and_fall_back_for_unknown_topics():
+    from scoring import BMI_TOPIC, generate_strengths_html, generate_summary, summary_fragments
+
+    q = questions[0]
+    fragments = summary_fragments()
+    assert summary_fragments() is fragments
+    gap = {'topic': q.short_topic, 'category': q.category, 'score': 0,
+           'advice': q.advice_by_score[0], 'severity': q.severity}
+    assert fragments.gap[(q.short_topic, 0)] in generate_summary([gap])
+    assert generate_strengths_html([gap]) == fragments.strength[(q.short_topic, 0)]
+
+    # BMI advice depends on the person, so it is formatted around the cached opening tag
+    bmi = {'topic': BMI_TOPIC, 'category': 'Physical', 'score': 0, 'advice': "BMI 32.9: x", 'severity': 3}
+    summary = generate_summary([bmi, gap, dict(gap, topic="other")])
+    assert f"<b>{BMI_TOPIC}:</b> BMI 32.9: x</div>" in summary and summary.count(q.advice_by_score[0]) == 1
+    assert generate_strengths_html([bmi]).endswith(f"<b>✅ {BMI_TOPIC}</b>: BMI 32.9: x</div>")
+
+
+def test_question_bank_file_cache_hot_reload_and_versioned_rescoring(tmp_path, monkeypatch):
+    import json
+    import pandas as pd
+    import data
+    from batch_scoring import score_batch
+    from scoring import calculate_results
+
+    with open(data.BANK_PATH, encoding="utf-8") as f:
+        spec = json.load(f)
+    bad = json.loads(json.dumps(spec))
+    bad['questions'][1]['id'] = 1
+    bad['questions'][2]['advice'][0]['scores'] = [9]
+    with pytest.raises(data.QuestionBankError, match="unique.*advice scores"):
+        data.compile_bank(bad)
+
+    # v2 flips the scores of question 1
+    spec['version'] = 2
+    for c, score in zip(spec['questions'][0]['choices'], (3, 2, 1, 0)):
+        c['score'] = score
+    path = str(tmp_path / "bank.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False)
+
+    v1 = data.current_bank()
+    v2 = data.load_bank(path)
+    monkeypatch.setattr(data, "compile_bank", lambda *a, **k: pytest.fail("cache not used"))
+    assert data.load_bank(path) == v2
+
+    try:
+        assert data.reload_bank(path, force=True) is data.get_bank(2)
+        assert data.get_bank(1) is v1
+        assert calculate_results({1: 0})[0]['Physical']['score'] == 3
+        assert calculate_results({1: 0}, bank=v1)[0]['Physical']['score'] == 0
+
+        rows = pd.DataFrame({'Q1': [1, 1, 1], 'Bank_Version': [1, 2, None]})
+        assert list(score_batch(rows)['Physical_Score']) == [0, 3, 3]
+
+        # Another worker (here: a process that never loaded v2) finds the archived copy
+        assert os.path.exists(str(tmp_path / "bank.v2.json"))
+        monkeypatch.undo()  # compile_bank: the archive has no cache yet
+        monkeypatch.setattr(data, "BANK_PATH", path)
+        monkeypatch.delitem(data._banks, 2)
+        assert data.get_bank(2) == v2 and data.get_bank(7) is None
+    finally:
+        data.register_bank(v1, make_current=True)
+
+
+def test_invalid_bank_file_is_reported_once(tmp_path, monkeypatch, capsys):
+    import data
+
+    path = str(tmp_path / "bank.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"version": 9, "questions": [{}]}')
+    monkeypatch.setattr(data, "RELOAD_INTERVAL", 0)
+    monkeypatch.setattr(data, "_file_signature", data._file_signature)
+    current = data.current_bank()
+    for _ in range(3):
+        assert data.reload_bank(path) is current
+    assert capsys.readouterr().err.count("Keeping question bank") == 1
+
+
+def test_bank_is_archived_when_first_served_not_at_import(tmp_path):
+    import shutil
+    import subprocess
+    import sys
+    import data
+
+    path = str(tmp_path / "bank.json")
+    shutil.copy(data.BANK_PATH, path)
+    env = dict(os.environ, QUESTION_BANK=path)
+    root = os.path.dirname(os.path.abspath(data.__file__))
+    archived = data.archive_path(data.BANK_VERSION, path)
+
+    def run(code):
+        subprocess.run([sys.executable, "-c", code], cwd=root, env=env, check=True)
+
+    run("import data")
+    assert not os.path.exists(archived)
+    run("import data; data.reload_bank(data.BANK_PATH)")
+    assert os.path.exists(archived)
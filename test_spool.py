@@ -0,0 +1,77 @@
+from spool import Spool, encode_record
+from storage import SheetsAppendWriter
+from tests.fakes import FakeWorksheet
+
+
+def test_spool_roundtrip_and_torn_tail(tmp_path):
+    spool = Spool(str(tmp_path / "spool.log"))
+    spool.append({'Submission_ID': 'a', 'Q1': 1})
+    spool.append_many([{'Submission_ID': 'b', 'Q1': 2}, {'Submission_ID': 'c', 'Q1': 'ไทย'}])
+
+    # simulate a crash in the middle of the next write
+    with open(spool.path, "ab") as f:
+        f.write(b"\x00\x00\x01\x00garbage")
+
+    rows = [row for _, row in spool.read()]
+    assert [r['Submission_ID'] for r in rows] == ['a', 'b', 'c']
+    assert rows[2]['Q1'] == 'ไทย'
+
+
+def test_corrupt_record_mid_file_is_quarantined_and_later_records_replayed(tmp_path):
+    spool = Spool(str(tmp_path / "spool.log"))
+    spool.append({'Submission_ID': 'a', 'Q1': 1})
+    # a crash mid-write, then more rows appended after the restart
+    with open(spool.path, "ab") as f:
+        f.write(b"\x00\x00\x01\x00garbage")
+    spool.append_many([{'Submission_ID': 'b', 'Q1': 2}, {'Submission_ID': 'c', 'Q1': 3}])
+    # and a record whose payload was damaged in place
+    damaged = bytearray(encode_record({'Submission_ID': 'x', 'Q1': 4}))
+    damaged[-2] ^= 0xFF
+    with open(spool.path, "ab") as f:
+        f.write(bytes(damaged))
+    spool.append({'Submission_ID': 'd', 'Q1': 5})
+
+    assert [r['Submission_ID'] for _, r in spool.read()] == ['a', 'b', 'c', 'd']
+
+    ws = FakeWorksheet()
+    assert spool.replay(SheetsAppendWriter(ws)) == 4
+    assert not spool.has_pending()
+    assert [r[0] for r in ws.rows[1:]] == ['a', 'b', 'c', 'd']
+    with open(spool.corrupt_path, "rb") as f:
+        assert f.read() == b"\x00\x00\x01\x00garbage" + bytes(damaged)
+
+
+def test_replay_is_idempotent(tmp_path):
+    spool = Spool(str(tmp_path / "spool.log"))
+    spool.append_many([{'Submission_ID': sid, 'Q1': 1} for sid in 'abc'])
+
+    ws = FakeWorksheet()
+    writer = SheetsAppendWriter(ws)
+    # 'a' reached the sheet before the process died, but the offset was never committed
+    writer.append({'Submission_ID': 'a', 'Q1': 1})
+
+    assert spool.replay(writer) == 2
+    assert not spool.has_pending()
+    assert spool.replay(writer) == 0
+
+    spool.append({'Submission_ID': 'd', 'Q1': 1})
+    assert spool.replay(writer) == 1
+    assert [r[0] for r in ws.rows[1:]] == ['a', 'b', 'c', 'd']
+
+
+def test_workers_sharing_a_spool_replay_each_row_once(tmp_path):
+    import threading
+
+    path = str(tmp_path / "spool.log")
+    Spool(path).append_many([{'Submission_ID': sid, 'Q1': 1} for sid in 'abcdef'])
+
+    # Two Spool objects stand in for two worker processes (each has its own thread lock)
+    ws = FakeWorksheet(latency=0.02)
+    writer = SheetsAppendWriter(ws)
+    threads = [threading.Thread(target=Spool(path).replay, args=(writer, 2)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [r[0] for r in ws.rows[1:]] == list('abcdef')
+    assert not Spool(path).has_pending()
@@ -0,0 +1,319 @@
+import sqlite3
+import threading
+
+from storage import SheetsAppendWriter
+from tests.fakes import FakeWorksheet
+
+
+def test_append_writes_header_then_rows():
+    ws = FakeWorksheet()
+    writer = SheetsAppendWriter(ws)
+    writer.append({'Timestamp': 't1', 'Q1': 1})
+    writer.append({'Timestamp': 't2', 'Q1': 2, 'Q2': 3})
+
+    rows = ws.get_all_values()
+    assert rows[0] == ['Timestamp', 'Q1', 'Q2']
+    assert rows[1] == ['t1', 1]
+    assert rows[2] == ['t2', 2, 3]
+
+
+def test_append_does_not_read_existing_rows():
+    ws = FakeWorksheet(rows=[['Timestamp', 'Q1']] + [[f"t{i}", 1] for i in range(1000)])
+    writer = SheetsAppendWriter(ws)
+    writer.append({'Timestamp': 'new', 'Q1': 2})
+    calls = ws.calls
+    writer.append({'Timestamp': 'new2', 'Q1': 3})
+    # header cached: a second append is exactly one API call regardless of sheet size
+    assert ws.calls == calls + 1
+    assert len(ws.rows) == 1003
+
+
+def _run_concurrently(n, target):
+    barrier = threading.Barrier(n)
+
+    def worker(i):
+        barrier.wait()
+        target(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_header_is_only_extended_and_rechecked_after_appends(capsys):
+    ws = FakeWorksheet()
+    a, b = SheetsAppendWriter(ws), SheetsAppendWriter(ws)
+    a.append({'Timestamp': 't1', 'Q1': 1})
+    b.append({'Timestamp': 't2', 'Q2': 2})
+    # a's cached header is a prefix of the extended one: its rows keep their labels
+    a.append({'Timestamp': 't3', 'Q1': 3})
+    assert ws.rows[0] == ['Timestamp', 'Q1', 'Q2'] and a._header == ws.rows[0]
+    assert capsys.readouterr().err == ""
+
+    # Someone reorders row 1 and widens it: the next append notices and reports it
+    ws.rows[0] = ['Q1', 'Timestamp', 'Q2', 'Note']
+    b.append({'Timestamp': 't4', 'Q1': 4})
+    assert "header changed" in capsys.readouterr().err
+    assert b._header == ws.rows[0]
+
+
+def test_read_modify_write_loses_rows():
+    # The old pattern: every session reads the whole sheet and writes it back.
+    ws = FakeWorksheet(rows=[['Timestamp']], latency=0.01)
+
+    def rewrite(i):
+        data = ws.get_all_values()
+        ws.update(range_name="A1", values=data + [[f"t{i}"]])
+
+    _run_concurrently(8, rewrite)
+    assert len(ws.rows) - 1 < 8
+
+
+def test_concurrent_appends_keep_every_row():
+    ws = FakeWorksheet(rows=[['Timestamp']], latency=0.01)
+    writer = SheetsAppendWriter(ws)
+
+    _run_concurrently(8, lambda i: writer.append({'Timestamp': f"t{i}"}))
+    assert sorted(r[0] for r in ws.rows[1:]) == sorted(f"t{i}" for i in range(8))
+
+
+def test_write_behind_queue_batches_rows():
+    from submit_queue import WriteBehindQueue
+
+    ws = FakeWorksheet(rows=[['Timestamp']])
+    writer = SheetsAppendWriter(ws)
+    q = WriteBehindQueue(max_batch=10, max_delay=0.05)
+    for i in range(25):
+        assert q.put(writer, {'Timestamp': f"t{i}"})
+    assert q.flush(timeout=5)
+    q.close()
+
+    assert [r[0] for r in ws.rows[1:]] == [f"t{i}" for i in range(25)]
+    assert q.flushed == 25
+
+
+def test_write_behind_queue_retries_then_reports_failure():
+    from submit_queue import WriteBehindQueue
+
+    class FlakySink:
+        def __init__(self, failures):
+            self.failures = failures
+            self.rows = []
+
+        def append_many(self, rows):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("quota")
+            self.rows.extend(rows)
+
+    failed = []
+    q = WriteBehindQueue(max_delay=0.01, max_retries=2, backoff=0.001,
+                         on_failure=lambda sink, rows, err: failed.extend(rows))
+    flaky, dead = FlakySink(failures=2), FlakySink(failures=99)
+    q.put(flaky, {'a': 1})
+    q.flush(timeout=5)
+    q.put(dead, {'b': 2})
+    q.flush(timeout=5)
+    q.close()
+
+    assert flaky.rows == [{'a': 1}]
+    assert failed == [{'b': 2}]
+
+
+def test_sqlite_backend_append_scan_and_idempotent_ids(tmp_path):
+    from storage import SQLiteBackend
+
+    db = SQLiteBackend(str(tmp_path / "r.db"), columns=['Submission_ID', 'Q1'])
+    db.append_many([{'Submission_ID': 'a', 'Q1': 1}, {'Submission_ID': 'b', 'Q1': 2, 'Q2': 3}])
+    db.append({'Submission_ID': 'a', 'Q1': 4})  # replayed duplicate is ignored
+
+    assert sorted(db.existing_ids()) == ['a', 'b']
+    assert [r['Submission_ID'] for r in db.scan({'Q1': 2})] == ['b']
+    assert list(db.scan({'Missing': 1})) == []
+    assert next(db.scan({'Submission_ID': 'b'}))['Q2'] == 3
+
+    # Scans stream in batches and do not block appends made meanwhile
+    scan = db.scan(batch_size=1)
+    assert next(scan)['Submission_ID'] == 'a'
+    db.append({'Submission_ID': 'c', 'Q1': 5})
+    assert [r['Submission_ID'] for r in scan] == ['b']
+    assert len(list(db.scan())) == 3
+
+
+def test_failed_local_primary_is_spooled_with_its_own_message(tmp_path, monkeypatch):
+    from persistence import save_submission
+    from scoring import calculate_results
+
+    monkeypatch.chdir(tmp_path)
+    results, _, _ = calculate_results({1: 0})
+    config = {'backend': 'sqlite', 'path': str(tmp_path), 'mirror': '', 'aggregates_path': ''}  # a directory
+    ok, msg = save_submission(60, 170, 30, results, {1: 0}, consent=True, config=config)
+    assert not ok and msg.startswith("บันทึกลงฐานข้อมูล SQLite ไม่ได้ (บันทึกในเครื่องแทน)")
+    assert (tmp_path / "assessment_spool.sqlite.log").exists()
+
+
+def test_csv_backend_roundtrip(tmp_path):
+    from storage import CsvBackend
+
+    backend = CsvBackend(str(tmp_path / "r.csv"), ['Submission_ID', 'Q1'])
+    backend.append({'Submission_ID': 'a', 'Q1': 1})
+    backend.append_many([{'Submission_ID': 'b', 'Q1': 2}])
+    assert [r['Submission_ID'] for r in backend.scan({'Q1': 2})] == ['b']
+    assert backend.existing_ids() == ['a', 'b']
+
+    # A row from a newer bank widens the header instead of losing its columns
+    CsvBackend(backend.path, ['Submission_ID']).append({'Submission_ID': 'c', 'Q1': 3, 'Bank_Version': 2, 'Q99': 4})
+    rows = list(backend.scan())
+    assert rows[0] == {'Submission_ID': 'a', 'Q1': '1', 'Bank_Version': '', 'Q99': ''}
+    assert rows[2] == {'Submission_ID': 'c', 'Q1': '3', 'Bank_Version': '2', 'Q99': '4'}
+
+
+def test_save_submission_sqlite_primary_with_sheets_mirror(tmp_path):
+    from persistence import save_submission
+    from scoring import calculate_results
+    from storage import set_sheet_writer
+    from submit_queue import get_submission_queue
+
+    sheet_url = f"fake://{tmp_path}"
+    ws = FakeWorksheet()
+    set_sheet_writer(sheet_url, SheetsAppendWriter(ws))
+    config = {'backend': 'sqlite', 'path': str(tmp_path / "r.db"), 'mirror': 'sheets', 'sheet_url': sheet_url,
+              'aggregates_path': str(tmp_path / "agg.json")}
+
+    answers = {1: 2, 11: 0}
+    results, _, _ = calculate_results(answers, weight=60, height=170)
+    ok, _ = save_submission(60, 170, 30, results, answers, consent=True, config=config)
+    assert ok
+    assert get_submission_queue().flush(timeout=10)
+
+    from persistence import local_backend
+    stored = list(local_backend('sqlite', config['path']).scan())
+    assert len(stored) == 1 and stored[0]['Q1'] == 3
+    header = ws.rows[0]
+    assert ws.rows[1][header.index('Submission_ID')] == stored[0]['Submission_ID']
+
+
+def test_sheets_pool_caps_in_flight_calls_and_refreshes_token():
+    import datetime
+    from sheets_pool import SheetsClientPool
+
+    class FakeCredentials:
+        def __init__(self):
+            self.valid = True
+            self.expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=60)
+            self.refreshes = 0
+
+        def refresh(self, request):
+            self.refreshes += 1
+            self.expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+    class FakeSpreadsheet:
+        def get_worksheet(self, index):
+            return FakeWorksheet(latency=0.02)
+
+    class FakeClient:
+        opened = 0
+
+        def open_by_url(self, url):
+            FakeClient.opened += 1
+            return FakeSpreadsheet()
+
+    creds = FakeCredentials()
+    pool = SheetsClientPool(max_in_flight=2, refresh_margin=300, credentials=creds, client=FakeClient())
+    ws = pool.worksheet("fake://sheet")
+    assert pool.worksheet("fake://sheet") is ws and FakeClient.opened == 1
+
+    in_flight, peak = [0], [0]
+    original = ws._worksheet.append_rows
+
+    def tracking(values, **kwargs):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        original(values, **kwargs)
+        in_flight[0] -= 1
+
+    ws._worksheet.append_rows = tracking
+    _run_concurrently(6, lambda i: ws.append_rows([[i]]))
+    assert peak[0] <= 2
+    assert len(ws.rows) == 6
+    # the token was within the refresh margin: refreshed once, before the first call
+    assert creds.refreshes == 1
+
+
+def test_submit_submission_saves_once_per_key(tmp_path, monkeypatch):
+    import uuid
+    from persistence import local_backend, submit_submission, wait_for_submissions
+    from scoring import calculate_results
+
+    db = str(tmp_path / "r.db")
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("STORAGE_PATH", db)
+    monkeypatch.setenv("AGGREGATES_PATH", "")
+    answers = {1: 2}
+    results, _, _ = calculate_results(answers)
+
+    key = uuid.uuid4().hex
+    first = submit_submission(key, 60, 170, 30, results, answers, consent=True)
+    assert submit_submission(key, 60, 170, 30, results, answers, consent=True) is first
+    assert wait_for_submissions(timeout=10)
+    assert first.result()[0]
+    assert [r['Submission_ID'] for r in local_backend('sqlite', db).scan()] == [key]
+
+
+def test_shared_state_sessions_and_outbox_across_processes(tmp_path):
+    from shared_state import SessionStore, SharedOutbox
+
+    path = str(tmp_path / "shared.db")
+    store = SessionStore(path)
+    state = {'step': 'assessment', 'q_idx': 3, 'answers': {1: 2, 11: 0}, 'unrelated': object()}
+    store.save("tok", store.encode(state))
+    assert SessionStore(path).load("tok") == {'step': 'assessment', 'q_idx': 3, 'answers': {1: 2, 11: 0}}
+    store.delete("tok")
+    assert store.load("tok") is None
+
+    # Finished sessions lose the email; stale sessions are pruned on open
+    store.save("done", store.encode({'step': 'final', 'email': "a@b.co", 'save_result': [True, "ok"]}))
+    assert store.load("done") == {'step': 'final', 'save_result': [True, "ok"]}
+    assert SessionStore(path, max_age=-1).load("done") is None
+
+    # Rows queued by a worker that stops are flushed by another worker sharing the file
+    ws = FakeWorksheet()
+    sink = SheetsAppendWriter(ws)
+    first = SharedOutbox(path, lambda key: sink, poll=0.01)
+    first.close()
+    for i in range(5):
+        first.put("sheet", {'Submission_ID': str(i), 'Q1': i})
+    second = SharedOutbox(path, lambda key: sink, poll=0.01)
+    assert second.flush(timeout=10)
+    second.close()
+    assert [r[0] for r in ws.rows[1:]] == [str(i) for i in range(5)]
+
+
+def test_shared_outbox_retries_a_busy_delete(tmp_path):
+    from shared_state import SharedOutbox
+
+    class BusyConnection:
+        # Fails the first DELETEs like a database locked by another worker
+        def __init__(self, conn):
+            self.conn, self.failures = conn, 2
+
+        def executemany(self, sql, params):
+            if sql.startswith("DELETE") and self.failures:
+                self.failures -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return self.conn.executemany(sql, params)
+
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+    ws = FakeWorksheet()
+    outbox = SharedOutbox(str(tmp_path / "shared.db"), lambda key: SheetsAppendWriter(ws), poll=0.01)
+    outbox._conn = BusyConnection(outbox._conn)
+    outbox.put("sheet", {'Submission_ID': "a"})
+    assert outbox.flush(timeout=10)
+    outbox.put("sheet", {'Submission_ID': "b"})
+    assert outbox.flush(timeout=10)
+    outbox.close()
+    assert [r[0] for r in ws.rows[1:]] == ["a", "b"]
@@ -0,0 +1,70 @@
+"""
+Test doubles shared by the tests and the load benchmarks.
+"""
+import threading
+import time
+
+from storage import _column_letter
+
+
+class FakeWorksheet:
+    """
+    In-memory stand-in for the gspread Worksheet methods the writers use.
+    `latency` (seconds) is slept inside each call to widen race windows in tests.
+    """
+
+    def __init__(self, rows=None, latency=0.0):
+        self.rows = [list(r) for r in (rows or [])]
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _tick(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def row_values(self, row):
+        self._tick()
+        with self._lock:
+            return list(self.rows[row - 1]) if len(self.rows) >= row else []
+
+    def col_values(self, col):
+        self._tick()
+        with self._lock:
+            return [r[col - 1] for r in self.rows if len(r) >= col]
+
+    def get_all_values(self):
+        self._tick()
+        with self._lock:
+            return [list(r) for r in self.rows]
+
+    def update(self, range_name="A1", values=None, **kwargs):
+        column, row = range_name.rstrip("0123456789"), range_name[len(range_name.rstrip("0123456789")):]
+        if row != "1" or not column.isalpha():
+            raise NotImplementedError("FakeWorksheet only supports updates anchored in row 1")
+        start = 0
+        for ch in column.upper():
+            start = start * 26 + ord(ch) - ord("A") + 1
+        start -= 1
+        self._tick()
+        with self._lock:
+            for i, new_row in enumerate(values or []):
+                if i >= len(self.rows):
+                    self.rows.append([])
+                current = self.rows[i] + [""] * (start - len(self.rows[i]))
+                self.rows[i] = current[:start] + list(new_row) + current[start + len(new_row):]
+
+    def append_row(self, values, **kwargs):
+        self.append_rows([values], **kwargs)
+
+    def append_rows(self, values, **kwargs):
+        """
+        Returns the tableRange of the values.append response (the table before the append).
+        """
+        self._tick()
+        with self._lock:
+            width = max((len(r) for r in self.rows), default=0)
+            table_range = f"Sheet1!A1:{_column_letter(width)}{len(self.rows)}" if self.rows else None
+            self.rows.extend(list(v) for v in values)
+        return {'tableRange': table_range} if table_range else {}